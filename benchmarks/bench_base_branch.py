@@ -0,0 +1,104 @@
+#!python3
+# -*- coding: utf-8 -*-
+"""Benchmark of `release_actions._get_base_branch` on a synthetic repository with a long history.
+
+    python benchmarks/bench_base_branch.py --commits 100000 --distances 0 1000 50000
+
+The repository is created with `git fast-import`: a linear history with `master` (as local
+branch and `origin/master`) `distance` first-parent commits below a `release-minor` branch
+that is checked out. The streaming resolver is compared with reading the whole
+`git log --first-parent --format=%D` output first, like before.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import release_actions  # noqa: E402
+
+
+def _buffered_get_base_branch() -> str:
+    """The former implementation, reading the whole first-parent history before looking at it."""
+    for remote_ref_names in release_actions._git("log", "--first-parent", "--format=%D").split("\n"):
+        ref_names = [ref_name.removeprefix("origin/")
+                     for ref_name in remote_ref_names.replace("HEAD -> ", "").split(", ")]
+        for ref in ref_names:
+            if ref == release_actions._MASTER_BRANCH or ref.startswith("v"):
+                return ref
+    raise release_actions.ReleaseActionsError("Could not find base branch")
+
+
+def create_repository(path: Path, commits: int) -> None:
+    subprocess.run(["git", "init", "-q", str(path)], check=True)
+    commands: List[str] = []
+    for number in range(1, commits + 1):
+        message = f"[feature] SDK-{number} change {number}\n"
+        commands += [
+            "commit refs/heads/release-minor",
+            f"mark :{number}",
+            f"committer Dev <dev@example.com> {1600000000 + number} +0000",
+            f"data {len(message.encode())}",
+            message,
+        ]
+    subprocess.run(["git", "-C", str(path), "fast-import", "--quiet"], input="\n".join(commands).encode(), check=True)
+    subprocess.run(["git", "-C", str(path), "symbolic-ref", "HEAD", "refs/heads/release-minor"], check=True)
+
+
+def _move_master(path: Path, distance: int) -> None:
+    commit = subprocess.check_output(["git", "-C", str(path), "rev-parse", f"release-minor~{distance}"]).decode().strip()
+    for ref in ["refs/heads/master", "refs/remotes/origin/master"]:
+        subprocess.run(["git", "-C", str(path), "update-ref", ref, commit], check=True)
+
+
+def _measure(resolve: Callable[[], str], repeat: int) -> Tuple[float, float, str]:
+    """Best wall time in ms and the peak of Python allocations in MiB."""
+    best, base_branch = float("inf"), ""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        base_branch = resolve()
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    resolve()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best * 1000, peak / 2**20, base_branch
+
+
+def main() -> None:
+    parser = ArgumentParser("Base Branch Benchmark")
+    parser.add_argument("--commits", type=int, default=100000)
+    parser.add_argument("--distances", type=int, nargs="+", default=[0, 1000, 50000],
+                        help="first-parent commits between HEAD and master")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "repo"
+        started = time.perf_counter()
+        create_repository(path, args.commits)
+        print(f"created {args.commits} commits in {time.perf_counter() - started:.1f} s\n")
+        print("| Distance | Resolver | ms | Peak MiB | Base branch |")
+        print("|---:|---|---:|---:|---|")
+        cwd = os.getcwd()
+        os.chdir(path)
+        try:
+            for distance in args.distances:
+                _move_master(path, distance)
+                for name, resolve in [("buffered", _buffered_get_base_branch),
+                                      ("streaming", release_actions._get_base_branch)]:
+                    ms, peak, base_branch = _measure(resolve, args.repeat)
+                    print(f"| {distance} | {name} | {ms:.1f} | {peak:.2f} | {base_branch} |", flush=True)
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!python3
+# -*- coding: utf-8 -*-
+"""Speed and precision of `common.parse_issues` over the commit messages of a git repository.
+
+    python benchmarks/bench_issue_extraction.py --repo ~/src/firmware --project-keys SDK,BR,FW
+    python benchmarks/bench_issue_extraction.py --synthetic 100000 --project-keys SDK
+
+The legacy extractor (loose pattern, then every blacklist pattern per hit) is the baseline.
+IDs of other projects than `--project-keys` are counted as false positives, each of them
+would have been a YouTrack request failing with 404.
+"""
+import random
+import re
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import common  # noqa: E402
+
+_LEGACY_BLACKLIST = [re.compile(f"^{pattern}$") for pattern in ("RS-232", "UTF-8", "UTF-16", r"CVE-\d+", r"AES-\d+")]
+
+_NOISE = ["SHA-256", "ISO-14443", "UTF-8", "RS-232", "CVE-2024", "AES-128", "EN-301", "MD-5", "X-25"]
+
+
+def _legacy_parse_issues(text: str) -> List[str]:
+    unique_issues = set(map(str.upper, common.ISSUE_REGEX.findall(text)))
+    return [t for t in unique_issues if not any(pattern.match(t) for pattern in _LEGACY_BLACKLIST)]
+
+
+def _git_messages(repo: str) -> List[str]:
+    output = subprocess.check_output(["git", "-C", repo, "log", "--all", "--format=%B%x01"])
+    return [message.strip() for message in output.decode(errors="replace").split("\x01") if message.strip()]
+
+
+def _synthetic_messages(count: int, project_keys: List[str]) -> List[str]:
+    random.seed(count)
+    messages = []
+    for number in range(count):
+        words = [random.choice(["fix", "add", "update", "refactor", "support", "handle"]) for _ in range(8)]
+        words.insert(random.randrange(len(words)), f"{random.choice(project_keys)}-{random.randrange(1, 5000)}")
+        if number % 3 == 0:
+            words.insert(random.randrange(len(words)), random.choice(_NOISE))
+        subject = " ".join(words)
+        # cherry-picks and reverts repeat messages, which the memoization benefits from
+        messages.append(random.choice(messages) if messages and number % 10 == 0 else f"{subject}\n\n{subject}")
+    return messages
+
+
+def _measure(extract: Callable[[str], List[str]], messages: List[str], project_keys: frozenset) -> Tuple[float, int, int]:
+    started = time.perf_counter()
+    results = [extract(message) for message in messages]
+    seconds = time.perf_counter() - started
+    found = sum(map(len, results))
+    foreign = sum(issue.split("-")[0] not in project_keys for issues in results for issue in issues)
+    return seconds, found, foreign
+
+
+def main() -> None:
+    parser = ArgumentParser("Issue Extraction Benchmark")
+    parser.add_argument("--repo", default=str(ROOT), help="git repository to read the commit messages from")
+    parser.add_argument("--synthetic", type=int, default=0, help="use this many generated messages instead")
+    parser.add_argument("--project-keys", default="SDK", help="comma separated short names of the real projects")
+    args = parser.parse_args()
+
+    project_keys = sorted(key.strip().upper() for key in args.project_keys.split(",") if key.strip())
+    messages = _synthetic_messages(args.synthetic, project_keys) if args.synthetic else _git_messages(args.repo)
+    keys = frozenset(project_keys)
+    print(f"{len(messages)} messages, {sum(map(len, messages)) / 2**20:.1f} MiB\n")
+    print("| Extractor | Seconds | Messages/s | IDs | Not in project keys |")
+    print("|---|---:|---:|---:|---:|")
+    extractors = [
+        ("legacy", _legacy_parse_issues),
+        ("combined pattern", lambda text: common.parse_issues(text, ())),
+        ("project keys", lambda text: common.parse_issues(text, keys)),
+        # the same messages again, as far as they are still in the LRU cache
+        ("project keys, second pass", lambda text: common.parse_issues(text, keys)),
+    ]
+    for name, extract in extractors:
+        if name != "project keys, second pass":
+            common._parse_issues.cache_clear()
+        seconds, found, foreign = _measure(extract, messages, keys)
+        print(f"| {name} | {seconds:.3f} | {len(messages) / seconds:.0f} | {found} | {foreign} |")
+
+
+if __name__ == "__main__":
+    main()
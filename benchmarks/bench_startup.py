@@ -0,0 +1,78 @@
+#!python3
+# -*- coding: utf-8 -*-
+"""Startup time of the `youtrack.py` subcommands, run as a script and from the zipapp.
+
+    python benchmarks/bench_startup.py --repeat 10
+    python benchmarks/bench_startup.py --script /path/to/older/youtrack.py --commands issue-tag
+
+Each subcommand is started with `--help`, so only the startup (imports, parser setup and
+compiling or loading the bytecode) is measured. The import time is the sum of the self times
+reported by `python -X importtime`.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from build_zipapp import build_zipapp  # noqa: E402
+from youtrack import _COMMANDS  # noqa: E402
+
+
+def _import_micros(stderr: str) -> Tuple[int, str]:
+    """Sum of the self import times in µs and the slowest module from `-X importtime` output."""
+    total, slowest, slowest_micros = 0, "", 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_micros, _, name = line[len("import time:"):].split("|")
+        total += int(self_micros)
+        if int(self_micros) > slowest_micros:
+            slowest, slowest_micros = name.strip(), int(self_micros)
+    return total, slowest
+
+
+def _measure(argv: List[str], repeat: int) -> Tuple[float, int, str]:
+    """Best wall time in ms of `repeat` runs, with the import time of the last run."""
+    best, stderr = float("inf"), ""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        process = subprocess.run([sys.executable, "-X", "importtime", *argv],
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        best = min(best, time.perf_counter() - started)
+        stderr = process.stderr
+    import_micros, slowest = _import_micros(stderr)
+    return best * 1000, import_micros, slowest
+
+
+def main() -> None:
+    parser = ArgumentParser("Startup Benchmark")
+    parser.add_argument("--commands", nargs="+", default=list(_COMMANDS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--script", default=str(ROOT / "youtrack.py"), help="youtrack.py to compare the zipapp with")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        zipapp = os.path.join(tmp_dir, "ci-scripts.pyz")
+        build_zipapp(Path(zipapp), ROOT)
+        baseline_ms, _, _ = _measure(["-c", "pass"], args.repeat)
+        print(f"interpreter startup (`python -c pass`): {baseline_ms:.1f} ms\n")
+        print("| Command | Entry point | ms | Imports ms | Slowest import |")
+        print("|---|---|---:|---:|---|")
+        for command in args.commands:
+            common_args = ["--base-url", "http://localhost", "--token", "token", command, "--help"]
+            for entry_point, argv in [("script", [args.script, *common_args]),
+                                      ("zipapp", [zipapp, "youtrack", *common_args])]:
+                ms, import_micros, slowest = _measure(argv, args.repeat)
+                print(f"| {command} | {entry_point} | {ms:.1f} | {import_micros / 1000:.1f} | {slowest} |",
+                      flush=True)
+
+
+if __name__ == "__main__":
+    main()
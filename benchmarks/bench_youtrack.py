@@ -0,0 +1,120 @@
+#!python3
+# -*- coding: utf-8 -*-
+"""Throughput and latency benchmark of `youtrack.py` against the local fake YouTrack server.
+
+    python benchmarks/bench_youtrack.py --sizes 10 100 1000 --latency 0.02 --workers 8
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_youtrack import FakeYouTrack  # noqa: E402
+from youtrack import YouTrack, YouTrackError  # noqa: E402
+
+
+def _scenarios(server: FakeYouTrack, size: int, comments_file: str, workers: int) -> Dict[str, Callable]:
+    issues = ",".join(f"{server.project}-{number}" for number in range(1, size + 1))
+    version = server.versions[-1]["name"]
+    return {
+        "add-comments": lambda yt: yt.add_comments(comments_file, workers=workers),
+        "issue-tag": lambda yt: yt.issue_tag(issues, "release,verified"),
+        "issue-watch": lambda yt: yt.issue_watch(issues, "alice,bob", workers=workers),
+        "issue-search": lambda yt: yt.issue_search(f"project: {server.project}"),
+        "issue-close": lambda yt: yt.issue_close(issues, "done"),
+        "release-version": lambda yt: yt.release_version(server.project, version),
+    }
+
+
+def _run(scenario: Callable, server: FakeYouTrack, use_async: bool, options: Dict[str, Any]) -> float:
+    """Run one scenario and return its duration; with an error rate POSTs may fail without retry."""
+    try:
+        return _timed(scenario, server, use_async, options)
+    except YouTrackError as e:
+        print(f"warning: {e}", file=sys.stderr)
+        return float("nan")
+
+
+def _timed(scenario: Callable, server: FakeYouTrack, use_async: bool, options: Dict[str, Any]) -> float:
+    if use_async:
+        from youtrack_async import AsyncYouTrack
+
+        async def main() -> None:
+            youtrack = AsyncYouTrack(server.base_url, "token", **options)
+            try:
+                await scenario(youtrack)
+            finally:
+                await youtrack.close()
+
+        started = time.perf_counter()
+        asyncio.run(main())
+        return time.perf_counter() - started
+
+    youtrack = YouTrack(server.base_url, "token", **options)
+    started = time.perf_counter()
+    try:
+        scenario(youtrack)
+    finally:
+        youtrack.close()
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = ArgumentParser("YouTrack Benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--scenarios", nargs="+",
+                        default=["add-comments", "issue-tag", "issue-watch", "issue-search", "issue-close", "release-version"])
+    parser.add_argument("--latency", type=float, default=0.01, help="server latency per request in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="server requests per second before 429")
+    parser.add_argument("--workers", type=int, default=8, help="workers for add-comments")
+    parser.add_argument("--rate", type=float, default=1000, help="client rate limit in requests per second")
+    parser.add_argument("--max-concurrency", type=int, default=16)
+    parser.add_argument("--async", dest="use_async", action="store_true", help="benchmark AsyncYouTrack")
+    parser.add_argument("--json", dest="json_file", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    options = {"rate": args.rate, "max_concurrency": args.max_concurrency, "cache_ttl": 0}
+    results: List[Dict[str, Any]] = []
+    print("| Scenario | Issues | Seconds | Requests | Requests/s | Connections | Throttled | KiB received |")
+    print("|---|---:|---:|---:|---:|---:|---:|---:|")
+    for size in args.sizes:
+        with FakeYouTrack(issues=size, versions=size, latency=args.latency, jitter=args.jitter,
+                          error_rate=args.error_rate, rate_limit=args.rate_limit) as server, \
+                tempfile.TemporaryDirectory() as tmp_dir:
+            comments_file = os.path.join(tmp_dir, "comments.json")
+            with open(comments_file, mode='w') as f:
+                json.dump({f"{server.project}-{number}": f"comment {number}" for number in range(1, size + 1)}, f)
+            scenarios = _scenarios(server, size, comments_file, args.workers)
+            for name in args.scenarios:
+                server.reset_stats()
+                seconds = _run(scenarios[name], server, args.use_async, options)
+                result = {
+                    "scenario": name,
+                    "issues": size,
+                    "seconds": seconds,
+                    "requests": server.request_count,
+                    "connections": len(server.connections),
+                    "throttled": server.throttled_count,
+                    "bytes_received": server.bytes_sent,
+                }
+                results.append(result)
+                print(f"| {name} | {size} | {seconds:.3f} | {result['requests']} "
+                      f"| {result['requests'] / seconds:.0f} | {result['connections']} | {result['throttled']} "
+                      f"| {result['bytes_received'] / 1024:.0f} |",
+                      flush=True)
+
+    if args.json_file:
+        with open(args.json_file, mode='w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
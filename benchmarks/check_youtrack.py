@@ -0,0 +1,70 @@
+#!python3
+# -*- coding: utf-8 -*-
+"""Consistency checks of `youtrack.py` and `youtrack_async.py` against the fake YouTrack server.
+
+    python benchmarks/check_youtrack.py --issues 1000
+
+Closing or tagging issues found by a query that filters on the changed value (`#Unresolved`,
+`-tag: release`) must still reach every match, although the matches leave the result set
+while later pages are fetched.
+"""
+import asyncio
+import os
+import sys
+from argparse import ArgumentParser
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_youtrack import FakeYouTrack  # noqa: E402
+from youtrack import YouTrack  # noqa: E402
+from youtrack_async import AsyncYouTrack  # noqa: E402
+
+
+def _run(server: FakeYouTrack, use_async: bool, call: Callable[[Any], Any]) -> Dict[str, Any]:
+    options = {"rate": 1000, "cache_ttl": 0}
+    if use_async:
+        async def main() -> Dict[str, Any]:
+            youtrack = AsyncYouTrack(server.base_url, "token", **options)
+            try:
+                return await call(youtrack)
+            finally:
+                await youtrack.close()
+
+        return asyncio.run(main())
+
+    youtrack = YouTrack(server.base_url, "token", **options)
+    try:
+        return call(youtrack)
+    finally:
+        youtrack.close()
+
+
+def main() -> None:
+    parser = ArgumentParser("YouTrack Checks")
+    parser.add_argument("--issues", type=int, default=1000)
+    args = parser.parse_args()
+
+    errors: List[str] = []
+    for use_async in (False, True):
+        client = "async" if use_async else "sync"
+        with FakeYouTrack(issues=args.issues, versions=1) as server:
+            result = _run(server, use_async, lambda yt: yt.issue_close(query="project: SDK #Unresolved"))
+            still_open = [i["idReadable"] for i in server.issues.values() if not i["state"].startswith("Closed")]
+            if still_open or len(result["closed"]) != args.issues:
+                errors.append(f"{client} issue-close: closed {len(result['closed'])}, {len(still_open)} still open")
+
+            result = _run(server, use_async, lambda yt: yt.issue_tag(query="project: SDK -tag: release", tags="release"))
+            untagged = [i["idReadable"] for i in server.issues.values() if "release" not in i["tags"]]
+            if untagged or len(result["tagged"]) != args.issues:
+                errors.append(f"{client} issue-tag: tagged {len(result['tagged'])}, {len(untagged)} untagged")
+
+    for error in errors:
+        print(f"FAILED: {error}")
+    if errors:
+        sys.exit(1)
+    print("all checks passed")
+
+
+if __name__ == "__main__":
+    main()
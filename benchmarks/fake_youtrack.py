@@ -0,0 +1,400 @@
+#!python3
+# -*- coding: utf-8 -*-
+"""In-memory stand-in for the parts of the YouTrack REST API used by `youtrack.py`.
+
+Run it standalone to point the CLI at it, or use `FakeYouTrack` from benchmarks:
+
+    python benchmarks/fake_youtrack.py --issues 1000 --latency 0.02 --rate-limit 100
+"""
+import gzip
+import json
+import random
+import re
+import sys
+import threading
+import time
+from argparse import ArgumentParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+_BUNDLE_ID = "62-1"
+_LINK_TYPES = [
+    {"id": "114-0", "name": "Depend"},
+    {"id": "114-1", "name": "Relate"},
+    {"id": "114-2", "name": "Subtask"},
+]
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # clients dropping pooled connections are expected, anything else is a bug in the fake
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeYouTrack:
+    """Threaded HTTP/1.1 server with configurable latency, error rate and throttling."""
+
+    def __init__(self, project: str = "SDK", issues: int = 100, versions: int = 100,
+                 tags: List[str] = ("release", "verified", "backport"),
+                 users: List[str] = ("alice", "bob", "gitlab@baltech.de"),
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_limit: float = 0.0, port: int = 0) -> None:
+        self.project = project
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.throttled_count = 0
+        self.bytes_sent = 0
+        self.connections: set = set()
+        self.issues: Dict[str, Dict[str, Any]] = {}
+        for number in range(1, issues + 1):
+            self.add_issue(project, f"Issue {number}")
+        self.versions = [{"id": f"63-{n}", "name": f"1.{n:02}.00", "released": False} for n in range(versions)]
+        self.tags = [{"id": f"6-{n}", "name": name} for n, name in enumerate(tags)]
+        self.users = [{"id": f"1-{n}", "login": login} for n, login in enumerate(users)]
+        self.comments: Dict[str, List[str]] = {}
+        self.attachments: Dict[str, List[int]] = {}
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._server = _Server(("127.0.0.1", port), _make_handler(self))
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self) -> "FakeYouTrack":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeYouTrack":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def reset_stats(self) -> None:
+        with self.lock:
+            self.request_count = 0
+            self.throttled_count = 0
+            self.bytes_sent = 0
+            self.connections = set()
+
+    def add_issue(self, project: str, summary: str) -> Dict[str, Any]:
+        number = len(self.issues) + 1
+        issue = {
+            "id": f"2-{number}",
+            "idReadable": f"{project}-{number}",
+            "summary": summary,
+            "project": {"shortName": project},
+            "state": "Open",
+            "tags": [],
+            "watchers": [],
+            "links": [],
+        }
+        self.issues[issue["idReadable"]] = issue
+        return issue
+
+    def find_issue(self, issue_id: str) -> Optional[Dict[str, Any]]:
+        issue = self.issues.get(issue_id.upper())
+        if issue is None:
+            issue = next((i for i in self.issues.values() if i["id"] == issue_id), None)
+        return issue
+
+    def search(self, query: str) -> List[Dict[str, Any]]:
+        issues = list(self.issues.values())
+        ids = re.search(r"issue id:\s*([^:]+?)(?:\s+\w+:|$)", query)
+        if ids:
+            wanted = {issue_id.upper() for issue_id in ids.group(1).replace(",", " ").split()}
+            issues = [i for i in issues if i["idReadable"] in wanted]
+        project = re.search(r"project:\s*\{?([\w-]+)\}?", query)
+        if project:
+            issues = [i for i in issues if i["project"]["shortName"] == project.group(1)]
+        if "#Unresolved" in query:
+            issues = [i for i in issues if not i["state"].startswith("Closed")]
+        for tag in re.findall(r"-tag:\s*(\{[^}]*\}|\S+)", query):
+            issues = [i for i in issues if tag.strip("{}") not in i["tags"]]
+        summary = re.search(r"summary:\s*(.+)$", query)
+        if summary:
+            terms = summary.group(1).strip().lower().split()
+            issues = [i for i in issues if all(term in i["summary"].lower() for term in terms)]
+        return issues
+
+    def render_issue(self, issue: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "$type": "Issue",
+            "id": issue["id"],
+            "idReadable": issue["idReadable"],
+            "summary": issue["summary"],
+            "project": issue["project"],
+            "tags": [{"name": name} for name in issue["tags"]],
+            "customFields": [
+                {"name": "State", "value": {"name": issue["state"]}},
+                {"name": "Fix versions", "projectCustomField": {"bundle": {"id": _BUNDLE_ID}}},
+            ],
+        }
+
+    def admit(self) -> bool:
+        """Count a request and decide whether it has to be throttled."""
+        with self.lock:
+            self.request_count += 1
+            if not self.rate_limit:
+                return True
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start, self._window_count = now, 0
+            self._window_count += 1
+            if self._window_count > self.rate_limit:
+                self.throttled_count += 1
+                return False
+            return True
+
+
+def _project(value: Any, fields: Optional[str]) -> Any:
+    """Apply the top-level names of a `fields` projection to an entity or a list of entities."""
+    if not fields:
+        return value
+    if isinstance(value, list):
+        return [_project(item, fields) for item in value]
+    names, depth = [""], 0
+    for char in fields:
+        depth += {"(": 1, ")": -1}.get(char, 0)
+        if char == "," and depth == 0:
+            names.append("")
+        elif depth == 0 and char != ")":
+            names[-1] += char
+    return {key: item for key, item in value.items() if key in names or key == "$type"}
+
+
+def _make_handler(server: FakeYouTrack) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # headers and body are written separately, avoid the Nagle / delayed ACK stall
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            self._dispatch("GET")
+
+        def do_POST(self) -> None:
+            self._dispatch("POST")
+
+        def _dispatch(self, method: str) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            with server.lock:
+                server.connections.add(self.client_address)
+            if server.latency or server.jitter:
+                time.sleep(server.latency + random.uniform(0, server.jitter))
+            if not server.admit():
+                return self._send(429, {"error": "too many requests"}, {"Retry-After": "1"})
+            if server.error_rate and random.random() < server.error_rate:
+                return self._send(503, {"error": "service unavailable"})
+
+            url = urlsplit(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            path = unquote(url.path).lstrip("/")
+            for pattern, handler in self.routes:
+                match = re.fullmatch(pattern, f"{method} {path}")
+                if match:
+                    with server.lock:
+                        status, payload = handler(self, query, body, *match.groups())
+                    if status < 400 and payload is not None:
+                        payload = _project(payload, query.get("fields"))
+                    return self._send(status, payload)
+            self._send(404, {"error": "not found"})
+
+        def _send(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+            data = json.dumps(payload).encode() if payload is not None else b""
+            headers = dict(headers or {})
+            if len(data) > 1024 and "gzip" in self.headers.get("Accept-Encoding", ""):
+                data = gzip.compress(data, compresslevel=6)
+                headers["Content-Encoding"] = "gzip"
+            with server.lock:
+                server.bytes_sent += len(data)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        @staticmethod
+        def _page(items: List[Any], query: Dict[str, str]) -> List[Any]:
+            skip = int(query.get("$skip", 0))
+            top = int(query.get("$top", 42))
+            return items[skip:] if top < 0 else items[skip:skip + top]
+
+        def list_issues(self, query, body):
+            issues = server.search(query.get("query", ""))
+            return 200, [server.render_issue(issue) for issue in self._page(issues, query)]
+
+        def create_issue(self, query, body):
+            data = json.loads(body)
+            issue = server.add_issue(data["project"]["shortName"], data["summary"])
+            return 200, server.render_issue(issue)
+
+        def get_issue(self, query, body, issue_id):
+            issue = server.find_issue(issue_id)
+            return (200, server.render_issue(issue)) if issue else (404, {"error": "issue not found"})
+
+        def update_issue(self, query, body, issue_id):
+            issue = server.find_issue(issue_id)
+            if not issue:
+                return 404, {"error": "issue not found"}
+            for field in json.loads(body).get("customFields", []):
+                if field.get("name") == "State":
+                    issue["state"] = field["value"]["name"]
+            return 200, server.render_issue(issue)
+
+        def add_comment(self, query, body, issue_id):
+            issue = server.find_issue(issue_id)
+            if not issue:
+                return 404, {"error": "issue not found"}
+            server.comments.setdefault(issue["idReadable"], []).append(json.loads(body)["text"])
+            return 200, {"id": "4-1"}
+
+        def add_attachments(self, query, body, issue_id):
+            issue = server.find_issue(issue_id)
+            if not issue:
+                return 404, {"error": "issue not found"}
+            server.attachments.setdefault(issue["idReadable"], []).append(len(body))
+            return 200, []
+
+        def add_tag(self, query, body, issue_id):
+            issue = server.find_issue(issue_id)
+            tag = next((t for t in server.tags if t["id"] == json.loads(body)["id"]), None)
+            if not issue or not tag:
+                return 404, {"error": "not found"}
+            if tag["name"] not in issue["tags"]:
+                issue["tags"].append(tag["name"])
+            return 200, tag
+
+        def add_watcher(self, query, body, issue_id):
+            issue = server.find_issue(issue_id)
+            if not issue:
+                return 404, {"error": "issue not found"}
+            issue["watchers"].append(json.loads(body)["user"]["id"])
+            return 200, {}
+
+        def add_link(self, query, body, issue_id, link_type_id):
+            issue = server.find_issue(issue_id)
+            target = server.find_issue(json.loads(body)["id"])
+            if not issue or not target:
+                return 404, {"error": "issue not found"}
+            issue["links"].append((link_type_id, target["idReadable"]))
+            return 200, {}
+
+        def apply_command(self, query, body):
+            data = json.loads(body)
+            issues = [server.find_issue(i.get("idReadable") or i.get("id", "")) for i in data.get("issues", [])]
+            if not issues or not all(issues):
+                return 400, {"error": "bad_request", "error_description": "unknown issue in command"}
+            commands = [(name, value.strip("{}"))
+                        for name, value in re.findall(r"(tag|State)\s+(\{[^}]*\}|\S+)", data["query"])]
+            if not commands:
+                return 400, {"error": "bad_request", "error_description": f"cannot parse {data['query']!r}"}
+            tag_names = {tag["name"] for tag in server.tags}
+            if any(name == "tag" and value not in tag_names for name, value in commands):
+                return 400, {"error": "bad_request", "error_description": "unknown tag in command"}
+            for issue in issues:
+                for name, value in commands:
+                    if name == "State":
+                        issue["state"] = value
+                    elif value not in issue["tags"]:
+                        issue["tags"].append(value)
+            return 200, {"query": data["query"]}
+
+        def list_tags(self, query, body):
+            return 200, self._page(server.tags, query)
+
+        def list_link_types(self, query, body):
+            return 200, _LINK_TYPES
+
+        def list_users(self, query, body):
+            return 200, self._page(server.users, query)
+
+        def get_user(self, query, body, login):
+            user = next((u for u in server.users if u["login"] == login), None)
+            return (200, user) if user else (404, {"error": "user not found"})
+
+        def list_projects(self, query, body):
+            return 200, self._page([{"shortName": server.project}], query)
+
+        def list_versions(self, query, body, bundle_id):
+            versions = server.versions
+            if query.get("query"):
+                versions = [v for v in versions if query["query"].lower() in v["name"].lower()]
+            return 200, self._page(versions, query)
+
+        def update_version(self, query, body, bundle_id, version_id):
+            version = next((v for v in server.versions if v["id"] == version_id), None)
+            if not version:
+                return 404, {"error": "version not found"}
+            version.update(json.loads(body))
+            return 200, version
+
+        routes = [
+            (r"GET api/issues", list_issues),
+            (r"POST api/issues", create_issue),
+            (r"GET api/issues/([^/]+)", get_issue),
+            (r"POST api/issues/([^/]+)", update_issue),
+            (r"POST api/issues/([^/]+)/comments", add_comment),
+            (r"POST api/issues/([^/]+)/attachments", add_attachments),
+            (r"POST api/issues/([^/]+)/tags", add_tag),
+            (r"POST api/issues/([^/]+)/watchers/issueWatchers", add_watcher),
+            (r"POST api/issues/([^/]+)/links/([^/]+)/issues", add_link),
+            (r"POST api/commands", apply_command),
+            (r"GET api/issueTags", list_tags),
+            (r"GET api/issueLinkTypes", list_link_types),
+            (r"GET api/users", list_users),
+            (r"GET api/users/([^/]+)", get_user),
+            (r"GET api/admin/projects", list_projects),
+            (r"GET api/admin/customFieldSettings/bundles/version/([^/]+)/values", list_versions),
+            (r"POST api/admin/customFieldSettings/bundles/version/([^/]+)/values/([^/]+)", update_version),
+        ]
+
+    return Handler
+
+
+def main() -> None:
+    parser = ArgumentParser("Fake YouTrack")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--project", default="SDK")
+    parser.add_argument("--issues", type=int, default=100)
+    parser.add_argument("--versions", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing with 503")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="requests per second before answering 429")
+    args = parser.parse_args()
+
+    server = FakeYouTrack(project=args.project, issues=args.issues, versions=args.versions,
+                          latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                          rate_limit=args.rate_limit, port=args.port)
+    print(f"fake YouTrack listening on {server.base_url}")
+    try:
+        server.start()._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
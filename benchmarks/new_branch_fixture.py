@@ -0,0 +1,81 @@
+#!python3
+# -*- coding: utf-8 -*-
+"""Fixture repository for the commit range of a newly pushed branch in `build_push_comment.py`.
+
+    python benchmarks/new_branch_fixture.py --master 500 --version-branch 2000 --feature 3
+
+Creates an origin with `master`, a version branch `v3.01` cut from an old master commit (with a
+tag) and a feature branch cut from the version branch, clones it and counts the commits that
+would be commented when the feature branch is pushed: `origin/master..feature` before, the
+commits not on any other remote branch or tag now.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from common import iter_commits, iter_new_branch_commits  # noqa: E402
+
+
+def _commits(branch: str, parent: str, count: int, first_number: int) -> List[str]:
+    """fast-import commands for `count` commits on `branch`, starting at the `parent` commit-ish."""
+    commands = [f"reset refs/heads/{branch}", f"from {parent}"] if parent else []
+    for number in range(first_number, first_number + count):
+        message = f"[feature] SDK-{number} change {number}\n"
+        commands += [
+            f"commit refs/heads/{branch}",
+            f"mark :{number}",
+            f"committer Dev <dev@example.com> {1600000000 + number} +0000",
+            f"data {len(message.encode())}",
+            message,
+        ]
+    return commands
+
+
+def create_fixture(path: Path, master: int, version_branch: int, feature: int) -> Path:
+    """Create the origin below `path` and return a clone with the feature branch checked out."""
+    origin, clone = path / "origin", path / "clone"
+    subprocess.run(["git", "init", "-q", "--bare", str(origin)], check=True)
+    branch_point = max(master - 400, 1)
+    commands = [
+        *_commits("master", "", master, 1),
+        *_commits("v3.01", f":{branch_point}", version_branch, master + 1),
+        f"reset refs/tags/v3.01.0\nfrom :{master + version_branch // 2}\n",
+        *_commits("feature/SDK-1", f":{master + version_branch}", feature, master + version_branch + 1),
+    ]
+    subprocess.run(["git", "-C", str(origin), "fast-import", "--quiet"],
+                   input="\n".join(commands).encode(), check=True)
+    subprocess.run(["git", "clone", "-q", "--branch", "feature/SDK-1", str(origin), str(clone)], check=True)
+    return clone
+
+
+def main() -> None:
+    parser = ArgumentParser("New Branch Fixture")
+    parser.add_argument("--master", type=int, default=500, help="commits on master")
+    parser.add_argument("--version-branch", type=int, default=2000, help="commits on the version branch v3.01")
+    parser.add_argument("--feature", type=int, default=3, help="commits on the new feature branch")
+    parser.add_argument("--keep", help="create the fixture in this directory and keep it")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(args.keep or tmp_dir)
+        os.makedirs(path, exist_ok=True)
+        clone = create_fixture(path, args.master, args.version_branch, args.feature)
+        before = sum(1 for _ in iter_commits(str(clone), "origin/master", "HEAD"))
+        now = sum(1 for _ in iter_new_branch_commits(str(clone), "feature/SDK-1", "HEAD"))
+        print("| Range | Commits |")
+        print("|---|---:|")
+        print(f"| origin/master..HEAD | {before} |")
+        print(f"| HEAD --not (other remote branches, tags) | {now} |")
+        if now != args.feature:
+            sys.exit(f"expected {args.feature} commits of the feature branch, got {now}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,7 @@ import json
 
 import qrcode
 
-from common import retrieve_commits, group_by_issue
+from common import iter_commits, group_by_issue
 
 
 AUTHOR_NAME = 'CI_AUTHOR_NAME'
@@ -41,7 +41,7 @@ def create_comments():
     if env[TICKET_ID]:
         affected_issues = [env[TICKET_ID]]
     else:
-        all_commits = retrieve_commits(
+        all_commits = iter_commits(
             env[PROJECT_DIR],
             'HEAD~' + env[NUM_COMMITS],
             env[CUR_COMMIT])
@@ -5,7 +5,7 @@ import io
 import json
 import sys
 
-from common import retrieve_commits, parse_subject, group_by_issue
+from common import iter_commits, iter_new_branch_commits, parse_subject, group_by_issue, read_ledger, write_ledger
 
 
 REPO_URL = 'CI_REPO_URL'
@@ -14,6 +14,8 @@ CUR_COMMIT = 'CI_COMMIT_SHA'
 BRANCH_NAME = 'CI_COMMIT_REF_NAME'
 PROJECT_NAME = 'CI_PROJECT_NAME'
 PROJECT_DIR = 'CI_PROJECT_DIR'
+# file of the (commit, issue) pairs commented before, the new pairs go to `<file>.pending`
+COMMENT_LEDGER = 'CI_COMMENT_LEDGER'
 
 
 def convert_to_comment(commits, repo_url, branch_name, project_name):
@@ -41,11 +43,15 @@ def convert_to_comment(commits, repo_url, branch_name, project_name):
 def create_comments():
     env = os.environ
     new_branch = all(c == '0' for c in env[START_COMMIT])
-    all_commits = retrieve_commits(
-        env[PROJECT_DIR],
-        'origin/master' if new_branch else env[START_COMMIT],
-        env[CUR_COMMIT])
-    affected_issues = group_by_issue(all_commits)
+    if new_branch:
+        all_commits = iter_new_branch_commits(env[PROJECT_DIR], env[BRANCH_NAME], env[CUR_COMMIT])
+    else:
+        all_commits = iter_commits(env[PROJECT_DIR], env[START_COMMIT], env[CUR_COMMIT])
+    ledger_file = env.get(COMMENT_LEDGER)
+    affected_issues = group_by_issue(all_commits, read_ledger(ledger_file) if ledger_file else frozenset())
+    if ledger_file:
+        write_ledger(f'{ledger_file}.pending', {
+            (commit.commitid, issue) for issue, commits in affected_issues.items() for commit in commits})
     return {
         issue: convert_to_comment(
             reversed(commits),
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Bundle the CI scripts into one zipapp with precompiled bytecode.
+
+    python build_zipapp.py --output ci-scripts.pyz
+    python ci-scripts.pyz youtrack --base-url ... --token ... issue-tag --issue SDK-1 --tags release
+
+The bytecode is stored next to each module (`youtrack.pyc` beside `youtrack.py`), where zipimport
+picks it up without compiling the sources on every run. It uses unchecked hash-based invalidation
+since the archive is immutable, so the mtime of the sources is never compared.
+"""
+
+import importlib.util
+import py_compile
+import sys
+import tempfile
+import zipfile
+
+from argparse import ArgumentParser
+from pathlib import Path
+
+
+SCRIPTS = [
+    "youtrack",
+    "youtrack_async",
+    "release_actions",
+    "common",
+    "build_android_comment",
+    "build_pr_comment",
+    "build_push_comment",
+    "commit_msg_validate",
+]
+
+_MAIN = """\
+import runpy
+import sys
+
+SCRIPTS = __SCRIPTS__
+
+
+def main() -> None:
+    if len(sys.argv) < 2 or sys.argv[1].removesuffix(".py") not in SCRIPTS:
+        sys.exit(f"usage: {sys.argv[0]} <script> [args...], scripts: {', '.join(SCRIPTS)}")
+    script = sys.argv.pop(1).removesuffix(".py")
+    sys.argv[0] = f"{script}.py"
+    runpy.run_module(script, run_name="__main__", alter_sys=True)
+
+
+main()
+"""
+
+
+def _add_module(archive: zipfile.ZipFile, name: str, source: str, tmp_dir: Path) -> None:
+    pyc_file = tmp_dir / f"{name}.pyc"
+    source_file = tmp_dir / f"{name}.py"
+    source_file.write_text(source)
+    py_compile.compile(str(source_file), cfile=str(pyc_file), dfile=f"{name}.py", doraise=True,
+                       invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+    archive.writestr(f"{name}.py", source)
+    archive.write(pyc_file, f"{name}.pyc")
+
+
+def build_zipapp(output: Path, source_dir: Path, interpreter: str = "/usr/bin/env python3") -> None:
+    with tempfile.TemporaryDirectory() as tmp, open(output, mode="wb") as f:
+        # like `zipapp`, the archive follows a shebang line so it can be executed directly
+        f.write(f"#!{interpreter}\n".encode())
+        with zipfile.ZipFile(f, mode="w") as archive:
+            tmp_dir = Path(tmp)
+            for name in SCRIPTS:
+                _add_module(archive, name, (source_dir / f"{name}.py").read_text(), tmp_dir)
+            _add_module(archive, "__main__", _MAIN.replace("__SCRIPTS__", repr(SCRIPTS)), tmp_dir)
+    output.chmod(0o755)
+
+
+def main() -> None:
+    parser = ArgumentParser("Build the CI scripts zipapp")
+    parser.add_argument("--output", type=Path, default=Path("ci-scripts.pyz"))
+    parser.add_argument("--source-dir", type=Path, default=Path(__file__).resolve().parent)
+    parser.add_argument("--interpreter", default="/usr/bin/env python3")
+    args = parser.parse_args()
+
+    build_zipapp(args.output, args.source_dir, args.interpreter)
+    print(f"{args.output} (bytecode for Python {sys.version_info.major}.{sys.version_info.minor}, "
+          f"magic {importlib.util.MAGIC_NUMBER.hex()})")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@
 import os
 import sys
 
-from common import retrieve_commits, parse_subject
+from common import iter_commits, parse_subject
 
 
 START_COMMIT = 'CI_COMMIT_BEFORE_SHA'
@@ -14,7 +14,7 @@ PROJECT_DIR = 'CI_PROJECT_DIR'
 
 def validate_commit_msgs():
     env = os.environ
-    commits = retrieve_commits(
+    commits = iter_commits(
         env[PROJECT_DIR],
         env[START_COMMIT] if env[BRANCH_NAME] == 'master' else 'origin/master',
         env[CUR_COMMIT])
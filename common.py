@@ -1,6 +1,9 @@
+import os
 import re
 import subprocess
 from collections import defaultdict, namedtuple
+from contextlib import closing
+from functools import lru_cache
 
 
 ISSUE_REGEX = re.compile(r'([A-Za-z]{2,4}-\d+)\S*')
@@ -10,8 +13,13 @@ ISSUE_REGEX_BLACKLIST = (
     "UTF-16",
     "CVE-\\d+",
     "AES-\\d+",
+    "SHA-\\d+",
+    "ISO-\\d+",
 )
-_ISSUE_COMPILED_REGEX_BLACKLIST = [re.compile(f"^{pattern}$") for pattern in ISSUE_REGEX_BLACKLIST]
+_ISSUE_ID_REGEX = re.compile(r'[A-Za-z]+-\d+')
+_BLACKLIST_REGEX = re.compile(f'(?i:{"|".join(ISSUE_REGEX_BLACKLIST)})')
+# comma separated short names of the YouTrack projects, see `youtrack.py project-keys`
+PROJECT_KEYS = 'CI_YOUTRACK_PROJECT_KEYS'
 
 COMMITTYPES = {
     'feature': '\u2795',         # plus sign
@@ -26,33 +34,149 @@ Commit = namedtuple('Commit', 'commitid, author, subject, body')
 Subject = namedtuple('subject', 'is_valid symbol text')
 
 
-def parse_issues(text):
-    unique_issues = set(map(str.upper, ISSUE_REGEX.findall(text)))
-    return [t for t in unique_issues if not any(pattern.match(t) for pattern in _ISSUE_COMPILED_REGEX_BLACKLIST)]
+@lru_cache(maxsize=None)
+def _issue_pattern(project_keys):
+    """One pattern finding all issue IDs in a single pass.
 
+    Without project keys, blacklisted tokens are matched (and then skipped) by the first
+    alternative, so they are consumed exactly like `ISSUE_REGEX` would consume them. The
+    lookahead keeps the blacklist from being tried at positions where no ID can start.
+    With project keys, only IDs of these projects match.
+    """
+    if project_keys:
+        keys = '|'.join(map(re.escape, sorted(project_keys, key=len, reverse=True)))
+        return re.compile(rf'(?<![A-Za-z])((?i:{keys})-\d+)\S*')
+    return re.compile(rf'(?=[A-Za-z]{{2,4}}-\d)'
+                      rf'(?:(?i:{"|".join(ISSUE_REGEX_BLACKLIST)})(?!\d)|([A-Za-z]{{2,4}}-\d+))\S*')
 
-def group_by_issue(commits):
+
+@lru_cache(maxsize=None)
+def _project_keys(value):
+    return frozenset(key.strip().upper() for key in value.split(',') if key.strip()) or None
+
+
+@lru_cache(maxsize=4096)
+def _parse_issues(text, project_keys):
+    issues = map(str.upper, filter(None, _issue_pattern(project_keys).findall(text)))
+    return tuple(dict.fromkeys(issues))
+
+
+def _resolve_project_keys(project_keys):
+    if project_keys is None:
+        return _project_keys(os.environ.get(PROJECT_KEYS, ''))
+    if not isinstance(project_keys, frozenset):
+        return _project_keys(','.join(project_keys))
+    return project_keys
+
+
+def parse_issues(text, project_keys=None):
+    """Issue IDs in `text` in order of appearance.
+
+    Only IDs of `project_keys` are returned, which default to the comma separated keys
+    in the `CI_YOUTRACK_PROJECT_KEYS` environment variable. Without any project keys,
+    every token that looks like an issue ID and is not blacklisted is returned.
+    """
+    return list(_parse_issues(text, _resolve_project_keys(project_keys)))
+
+
+def is_issue_id(token, project_keys=None):
+    """Whether a whole token is an issue ID, e.g. a `closes:` value of a PR body.
+
+    Like `parse_issues`, only IDs of the project keys are accepted and without project keys
+    blacklisted tokens like `UTF-8` are rejected, but the project key may be of any length.
+    """
+    if not _ISSUE_ID_REGEX.fullmatch(token):
+        return False
+    project_keys = _resolve_project_keys(project_keys)
+    if project_keys:
+        return token.split('-')[0].upper() in project_keys
+    return not _BLACKLIST_REGEX.fullmatch(token)
+
+
+def group_by_issue(commits, ledger=frozenset()):
+    """Commits per referenced issue, leaving out the (commit SHA, issue) pairs of `ledger`."""
     affected_issues = defaultdict(list)
     for commit in commits:
         commit_msg = f'{commit.subject}\n{commit.body}'
         for issue in parse_issues(commit_msg):
-            affected_issues[issue].append(commit)
+            if (commit.commitid, issue) not in ledger:
+                affected_issues[issue].append(commit)
     return dict(affected_issues)
 
 
+def read_ledger(path):
+    """(commit SHA, issue) pairs that were already commented, one `<sha> <issue>` line each."""
+    try:
+        with open(path) as f:
+            return {tuple(fields) for fields in map(str.split, f) if len(fields) == 2}
+    except FileNotFoundError:
+        return set()
+
+
+def write_ledger(path, pairs):
+    with open(path, 'w') as f:
+        f.writelines(f'{sha} {issue}\n' for sha, issue in sorted(pairs))
+
+
 def retrieve_commits(project_dir, start_commit, cur_commit='HEAD'):
+    return list(iter_commits(project_dir, start_commit, cur_commit))
+
+
+def iter_commits(project_dir, start_commit, cur_commit='HEAD', chunk_size=64 * 1024):
+    """Yield the commits of `git log start_commit..cur_commit` while git is still writing them."""
+    return _iter_log(project_dir, [f'{start_commit}..{cur_commit}'], chunk_size)
+
+
+def iter_new_branch_commits(project_dir, branch, cur_commit='HEAD', chunk_size=64 * 1024):
+    """Yield the commits of a newly pushed branch.
+
+    These are the commits not reachable from any other remote branch or tag, so a branch cut
+    from a version or release branch only yields its own commits and not all commits of that
+    branch that are missing on master.
+    """
+    return _iter_log(project_dir, [
+        cur_commit or 'HEAD', '--not', f'--exclude=origin/{branch}', '--remotes=origin', '--tags'
+    ], chunk_size)
+
+
+def _iter_log(project_dir, revisions, chunk_size):
     try:
-        git_log_output = subprocess.check_output(
-            ['git', '-C', project_dir, 'log',
-             f'{start_commit}..{cur_commit}',
-             '--format=%H%x00%aN%x00%s%x00%b%x01']).decode()
+        with closing(iter_git_output(
+                ['-C', project_dir, 'log', *revisions, '--format=%H%x00%aN%x00%s%x00%b%x01'],
+                '\x01', chunk_size)) as logs:
+            for log in logs:
+                if log.strip():
+                    yield Commit(*log.strip().split('\x00'))
     except subprocess.CalledProcessError as e:
-        if e.returncode == 128:
-            print("::warning::could not retrieve commits")
-            return []
-        raise
-    return [Commit(*log.strip().split('\x00'))
-               for log in git_log_output.split('\x01') if log.strip()]
+        if e.returncode != 128:
+            raise
+        print("::warning::could not retrieve commits")
+
+
+def iter_git_output(args, separator='\n', chunk_size=64 * 1024):
+    """Yield the `separator` terminated records of a git command while git is still writing them.
+
+    git is stopped once the caller stops reading, a failed git command raises `CalledProcessError`.
+    """
+    separator = separator.encode()
+    with subprocess.Popen(['git', *args], stdout=subprocess.PIPE) as process:
+        complete = False
+        try:
+            pending = b''
+            for chunk in iter(lambda: process.stdout.read1(chunk_size), b''):
+                *records, pending = (pending + chunk).split(separator)
+                for record in records:
+                    yield record.decode()
+            if pending:
+                yield pending.decode()
+            complete = True
+        finally:
+            if not complete:
+                # the consumer stopped early, git does not have to finish its output
+                process.kill()
+        returncode = process.wait()
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, process.args)
 
 
 def parse_subject(commit):
@@ -1,12 +1,17 @@
 #!/usr/bin/env python3
 
+import json
 import re
 import subprocess
+import sys
 
-from argparse import ArgumentParser, Namespace
+from argparse import ArgumentParser, ArgumentTypeError, Namespace
+from contextlib import closing
 from pathlib import Path
 from string import Template
-from typing import Literal, NamedTuple, get_args as get_type_args
+from typing import Iterator, Literal, NamedTuple, get_args as get_type_args
+
+from common import is_issue_id, iter_git_output
 
 
 ReleaseMode = Literal["major", "minor", "patch"]
@@ -16,6 +21,9 @@ _ZERO_PAD_PATTERN = re.compile(r"0\d")
 _RELEASE_MODES = list(get_type_args(ReleaseMode))
 _RELEASE_BRANCH_PATTERN = re.compile(rf"^release-(?P<mode>{'|'.join(_RELEASE_MODES)})(-(?P<project>\d\d\d\d))?$")
 _MASTER_BRANCH = "master"
+_PR_DIRECTIVE_PATTERN = re.compile(r"^(?P<directive>closes|apply-to):[ \t]*(?P<value>.*?)\s*$", re.MULTILINE)
+_SUB_PROJECT_GLOB = "[0-9][0-9][0-9][0-9]_*"
+_SUB_PROJECTS_MANIFEST = "sub-projects.json"
 
 
 class ReleaseActionsError(Exception):
@@ -53,28 +61,135 @@ def _is_valid_release_branch(branch_name: str) -> bool:
 
 
 def _get_base_branch() -> str:
-    log_lines = _git(
+    # the ref names are streamed, so only the history up to the base branch is read
+    with closing(iter_git_output([
         "log",
         "--first-parent",
         "--format=%D",  # only print ref names
-    ).split("\n")
-    for remote_ref_names in log_lines:
-        ref_names = [
-            ref_name.removeprefix("origin/")
-            for ref_name in remote_ref_names.replace("HEAD -> ", "").split(", ")
-        ]
-        if remote_ref_names.startswith("HEAD -> "):
-            if not any(_is_valid_release_branch(ref) for ref in ref_names):
-                raise ReleaseActionsError(
-                    "No release branch found that points to HEAD. "
-                    f"Branches pointing to HEAD: {', '.join(ref_names)}")
-        for ref in ref_names:
-            if ref == _MASTER_BRANCH or ref.startswith("v"):
-                return ref
+    ])) as log_lines:
+        for remote_ref_names in log_lines:
+            ref_names = [
+                ref_name.removeprefix("origin/")
+                for ref_name in remote_ref_names.replace("HEAD -> ", "").split(", ")
+            ]
+            if remote_ref_names.startswith("HEAD -> "):
+                if not any(_is_valid_release_branch(ref) for ref in ref_names):
+                    raise ReleaseActionsError(
+                        "No release branch found that points to HEAD. "
+                        f"Branches pointing to HEAD: {', '.join(ref_names)}")
+            for ref in ref_names:
+                if ref == _MASTER_BRANCH or ref.startswith("v"):
+                    return ref
     raise ReleaseActionsError(f"Could not find base branch ('{_MASTER_BRANCH}' "
                               f"or 'v*')")
 
 
+class SubProject(NamedTuple):
+    id: str | None
+    name: str
+    version_file: Path
+    youtrack_project: str
+    version_template: str
+
+    def current_version(self, *, required: bool = True) -> str:
+        if not self.version_file.exists():
+            if required:
+                raise ReleaseActionsError(f"version file `{self.version_file}` does not exists!")
+            return ""
+        return self.version_file.read_text().strip()
+
+
+def _parse_maybe_mapping(maybe_mapping: str) -> dict[str, str] | str:
+    """
+    WORKAROUND FOR PYTHONSW
+    since PythonSW has multiple projects with different YouTrack-Projects,
+    we need a way to define for each project a YouTrack project and version template.
+
+    So we allow the following optional syntax for the env vars where these values are defined to map from a project-id to a value:
+    <PRJ_ID_1>=<VALUE>,<PRJ_ID_1>=<VALUE>
+    e.g.: 3007=TB,3510=NRM
+
+    Returns the mapping, or the value itself if it is not a mapping.
+    """
+    try:
+        return dict(map(str.strip, pair.split("=")) for pair in maybe_mapping.split(","))
+    except ValueError:
+        return maybe_mapping
+
+
+def _value_for(maybe_mapping: dict[str, str] | str, spid: str | None, fallback: str) -> str:
+    if isinstance(maybe_mapping, str):
+        return maybe_mapping
+    return maybe_mapping.get(spid, fallback)
+
+
+class SubProjectRegistry:
+    """The root project and the `NNNN_*` sub-projects of a repository.
+
+    The sub-project directories are found with a single scan of the repository root, or read
+    from the optional `sub-projects.json` manifest:
+
+        {"3007": {"name": "3007_TouchBridge", "youtrack-project": "TB", "version-template": "..."}}
+
+    `version-file` defaults to `<name>/VERSION`, `youtrack-project` and `version-template` to the
+    values of the `--project` and `--version-template` mappings.
+    """
+
+    def __init__(self, root: SubProject, sub_projects: dict[str, SubProject]) -> None:
+        self.root = root
+        self.sub_projects = sub_projects
+
+    @classmethod
+    def load(cls, root_name: str, project: str, version_template: str,
+             base_dir: Path = Path(), manifest: Path | None = None) -> "SubProjectRegistry":
+        projects = _parse_maybe_mapping(project)
+        version_templates = _parse_maybe_mapping(version_template)
+
+        def sub_project(spid: str | None, name: str, version_file: Path, overrides: dict[str, str] | None = None) -> SubProject:
+            overrides = overrides or {}
+            return SubProject(
+                id=spid,
+                name=name,
+                version_file=version_file,
+                youtrack_project=overrides.get("youtrack-project") or _value_for(projects, spid, "UNKNOWN"),
+                version_template=overrides.get("version-template") or _value_for(version_templates, spid, "$version"),
+            )
+
+        manifest = manifest or base_dir / _SUB_PROJECTS_MANIFEST
+        sub_projects: dict[str, SubProject] = {}
+        if manifest.exists():
+            for spid, entry in json.loads(manifest.read_text()).items():
+                version_file = base_dir / entry.get("version-file", f"{entry['name']}/VERSION")
+                sub_projects[spid] = sub_project(spid, entry["name"], version_file, entry)
+        else:
+            for path in sorted(base_dir.glob(_SUB_PROJECT_GLOB)):
+                spid = path.name[:4]
+                if spid not in sub_projects:
+                    sub_projects[spid] = sub_project(spid, path.name, path / "VERSION")
+        return cls(sub_project(None, root_name, base_dir / "VERSION"), sub_projects)
+
+    def get(self, spid: str | None) -> SubProject:
+        if not spid:
+            return self.root
+        try:
+            return self.sub_projects[spid]
+        except KeyError:
+            raise ReleaseActionsError(f"'{spid}' is not a valid project id in this repository!")
+
+    def __iter__(self) -> Iterator[SubProject]:
+        yield self.root
+        yield from self.sub_projects.values()
+
+
+def _load_registry(args: Namespace) -> SubProjectRegistry:
+    return SubProjectRegistry.load(
+        root_name=args.release_name or args.repository_name,
+        project=args.project,
+        version_template=args.version_template,
+        manifest=Path(args.manifest) if args.manifest else None,
+    )
+
+
 class ReleaseEvent(NamedTuple):
     deploy_mode: Literal["development", "release"]
     stage: Literal["branch-created", "pr-merged", "tag-created", "commit-pushed"]
@@ -87,28 +202,10 @@ def print_release_context(args: Namespace) -> None:
     release_ref_pattern = rf"^refs/heads/{release_branch_pattern}$"
     version_tag_pattern = "refs/tags/v((?P<id>\d{4})-)?(\d{1,2}.\d{1,2}.\d{1,2})"
 
-    def _get_project_name(spid: str | None) -> str:
-        if not spid:
-            return args.release_name or args.repository_name
-
-        try:
-            return next(Path().glob(f"{spid}_*")).name
-        except StopIteration:
-            raise ReleaseActionsError(f"'{spid}' is not a valid project id in this repository!")
-
-
-    def _get_version_file(spid: str | None) -> Path:
-        if spid:
-            return Path(f"{_get_project_name(spid)}/VERSION")
-        return Path("VERSION")
+    registry = _load_registry(args)
 
     def _get_current_version(spid: str | None, *, required: bool = True) -> str:
-        versionfile = _get_version_file(spid)
-        if not versionfile.exists():
-            if required:
-                raise ReleaseActionsError(f"version file `{versionfile}` does not exists!")
-            return ""
-        return versionfile.read_text().strip()
+        return registry.get(spid).current_version(required=required)
 
     # create release branch
     if args.event == "create" and (match := re.match(release_ref_pattern, args.ref)):
@@ -168,10 +265,11 @@ def print_release_context(args: Namespace) -> None:
     print(f"release-mode={release_mode or ''}")
     print(f"release-stage={event.stage}")
     print(f"deploy-mode={event.deploy_mode}")
-    print(f"project-name={_get_project_name(event.sub_project_id)}")
+    sub_project = registry.get(event.sub_project_id)
+    print(f"project-name={sub_project.name}")
     print(f"sub-project-id={event.sub_project_id or ''}")
     print(f"version={event.version}")
-    print(f"version-file={_get_version_file(event.sub_project_id)}")
+    print(f"version-file={sub_project.version_file}")
 
     tag = f"v{event.sub_project_id}-{event.version}" if event.sub_project_id else f"v{event.version}"
     print(f"tag={tag}")
@@ -193,29 +291,86 @@ def print_release_context(args: Namespace) -> None:
     else:
         print("base-branch=")
 
-    def _get_value_from_maybe_mapping(maybe_mapping: str, *, key: str, fallback: str) -> str:
-        """
-        WORKAROUND FOR PYTHONSW
-        since PythonSW has multiple projects with different YouTrack-Projects,
-        we need a way to define for each project a YouTrack project and version template.
+    print(f"project={sub_project.youtrack_project}")
+
+    version = Template(sub_project.version_template).substitute(projectid=event.sub_project_id, version=event.version)
+    print(f"issue-version={version}")
+
+
+def print_sub_projects(args: Namespace) -> None:
+    """Print all projects of the repository with their current versions as one JSON list."""
+    print(json.dumps([
+        {
+            "sub-project-id": sub_project.id or "",
+            "project-name": sub_project.name,
+            "version-file": str(sub_project.version_file),
+            "version": sub_project.current_version(required=False),
+            "project": sub_project.youtrack_project,
+            "version-template": sub_project.version_template,
+        }
+        for sub_project in _load_registry(args)
+    ], indent=2))
+
+
+class PrDirectives(NamedTuple):
+    closes: list[str]
+    apply_to: list[str]
+
+
+def parse_pr_directives(body: str) -> PrDirectives:
+    """Collect the `closes: <issue>` and `apply-to: <branch>` lines of a PR body in one pass."""
+    closes: list[str] = []
+    apply_to: list[str] = []
+    for match in _PR_DIRECTIVE_PATTERN.finditer(body):
+        value = match.group("value")
+        if match.group("directive") == "closes":
+            # only whole tokens are issue IDs, a search would turn `PYTHONSW-12` into `ONSW-12`
+            issues = (token.upper() for token in re.split(r"[\s,]+", value) if is_issue_id(token))
+            closes.extend(issue for issue in issues if issue not in closes)
+        elif value and not re.search(r"\s", value) and value not in apply_to:
+            apply_to.append(value)
+    return PrDirectives(closes=closes, apply_to=apply_to)
+
 
-        So we allow the following optional syntax for the env vars where these values are defined to map from a project-id to a value:
-        <PRJ_ID_1>=<VALUE>,<PRJ_ID_1>=<VALUE>
-        e.g.: 3007=TB,3510=NRM
-        """
+def _read_pr_body(args: Namespace) -> str:
+    return sys.stdin.read() if args.body_file == "-" else Path(args.body_file).read_text()
+
+
+def parse_pr_body(args: Namespace) -> None:
+    """Print the directives of a PR body without contacting YouTrack."""
+    directives = parse_pr_directives(_read_pr_body(args))
+    print(json.dumps({"closes": directives.closes, "apply_to": directives.apply_to}, indent=2))
+
+
+def process_pr_body(args: Namespace) -> None:
+    from youtrack import YouTrack, YouTrackError
+
+    directives = parse_pr_directives(_read_pr_body(args))
+    result = {"closes": directives.closes, "apply_to": directives.apply_to}
+
+    if directives.closes:
+        youtrack = YouTrack(args.base_url, args.token)
         try:
-            mapping = dict(map(str.strip, pair.split("=")) for pair in maybe_mapping.split(","))
-        except ValueError:
-            return maybe_mapping
-        else:
-            return mapping.get(key, fallback)
+            result.update(youtrack.issue_close(",".join(directives.closes), args.resolution))
+        except YouTrackError as e:
+            result["error"] = str(e)
+        finally:
+            youtrack.close()
 
-    project = _get_value_from_maybe_mapping(args.project, key=event.sub_project_id, fallback="UNKNOWN")
-    print(f"project={project}")
+    print(json.dumps(result, indent=2))
+    if result.get("error"):
+        raise ReleaseActionsError(f"could not close issues: {result['error']}")
+    if result.get("failed"):
+        raise ReleaseActionsError(f"could not close {', '.join(sorted(result['failed']))}")
 
-    version_template = _get_value_from_maybe_mapping(args.version_template, key=event.sub_project_id, fallback="$version")
-    version = Template(version_template).substitute(projectid=event.sub_project_id, version=event.version)
-    print(f"issue-version={version}")
+
+def _resolution(value: str) -> str:
+    # youtrack (and with it http.client) is only imported when issues are closed
+    from youtrack import _RESOLUTION_MAP
+
+    if value not in _RESOLUTION_MAP:
+        raise ArgumentTypeError(f"invalid choice: {value!r} (choose from {', '.join(_RESOLUTION_MAP)})")
+    return value
 
 
 def main() -> None:
@@ -230,6 +385,26 @@ def main() -> None:
     prepare_next_version_parser.add_argument("--project", type=str, required=True)
     prepare_next_version_parser.add_argument("--version-template", type=str, required=True)
     prepare_next_version_parser.add_argument("--release-name", type=str, default="")
+    prepare_next_version_parser.add_argument("--manifest", type=str, help=f"default: {_SUB_PROJECTS_MANIFEST} if it exists")
+
+    print_sub_projects_parser = subparsers.add_parser("print-sub-projects")
+    print_sub_projects_parser.set_defaults(func=print_sub_projects)
+    print_sub_projects_parser.add_argument("--repository-name", type=str, required=True)
+    print_sub_projects_parser.add_argument("--project", type=str, default="UNKNOWN")
+    print_sub_projects_parser.add_argument("--version-template", type=str, default="$version")
+    print_sub_projects_parser.add_argument("--release-name", type=str, default="")
+    print_sub_projects_parser.add_argument("--manifest", type=str, help=f"default: {_SUB_PROJECTS_MANIFEST} if it exists")
+
+    parse_pr_body_parser = subparsers.add_parser("parse-pr-body")
+    parse_pr_body_parser.set_defaults(func=parse_pr_body)
+    parse_pr_body_parser.add_argument("--body-file", type=str, default="-")
+
+    process_pr_body_parser = subparsers.add_parser("process-pr-body")
+    process_pr_body_parser.set_defaults(func=process_pr_body)
+    process_pr_body_parser.add_argument("--body-file", type=str, default="-")
+    process_pr_body_parser.add_argument("--base-url", type=str, required=True)
+    process_pr_body_parser.add_argument("--token", type=str, required=True)
+    process_pr_body_parser.add_argument("--resolution", type=_resolution, default="done")
 
     args = parser.parse_args()
     args.func(args)
@@ -1,15 +1,19 @@
 #!python3
 # -*- coding: utf-8 -*-
-import datetime
+import codecs
+import itertools
 import json
+import math
 import os
+import re
 import sys
+import threading
+import time
+import zlib
 from argparse import ArgumentParser
-from urllib import request
-from urllib.error import HTTPError
-from urllib.parse import quote
-from subprocess import check_call
-from typing import Any, Optional, Dict, Tuple
+from http.client import HTTPConnection, HTTPResponse, HTTPSConnection, RemoteDisconnected
+from urllib.parse import quote, urlsplit
+from typing import Any, Callable, Optional, Dict, Iterable, Iterator, List, NoReturn, Tuple, Union
 
 
 _LINK_TYPE_MAP: Dict[str, Tuple[str, str]] = {
@@ -20,6 +24,27 @@ _LINK_TYPE_MAP: Dict[str, Tuple[str, str]] = {
     "subtask-of":       ("Subtask", "OUTWARD"),
 }
 
+# adaptive page size of streamed issue searches
+_PAGE_SIZE_MIN = 10
+_PAGE_SIZE_MAX = 1000
+_PAGE_TARGET_SECONDS = 1.0
+
+# issues per request to the commands endpoint
+_COMMAND_CHUNK_SIZE = 100
+
+# response bodies
+_ACCEPT_ENCODING = "gzip, deflate"
+_READ_CHUNK_SIZE = 64 * 1024
+_JSON_WHITESPACE = re.compile(r"[ \t\r\n]*")
+
+# retries of failed requests
+_IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+_RETRY_STATUS_CODES = {500, 502, 503, 504}
+_THROTTLE_STATUS_CODES = {429, 503}
+_BACKOFF_BASE_SECONDS = 0.5
+_BACKOFF_MAX_SECONDS = 30.0
+_MIN_RATE = 1.0
+
 _RESOLUTION_MAP: Dict[str, str] = {
     "done":                "Closed (Done)",
     "wont-do":             "Closed (Won't Do)",
@@ -29,88 +54,883 @@ _RESOLUTION_MAP: Dict[str, str] = {
 }
 
 
-def _fail(msg: str) -> None:
+class YouTrackError(Exception):
+    pass
+
+
+def _fail(msg: str) -> NoReturn:
+    raise YouTrackError(msg)
+
+
+def _print_error(msg: str) -> None:
     print(f"::error::{msg}" if os.environ.get("CI") else msg, file=sys.stderr)
-    sys.exit(1)
 
 
-def _get_status_code(req: request.Request) -> int:
+def _print_warning(msg: str) -> None:
+    print(f"::warning::{msg}" if os.environ.get("CI") else f"WARNING: {msg}", file=sys.stderr)
+
+
+def _next_page_size(page_size: int, elapsed: float) -> int:
+    """Grow the page size while pages arrive quickly, shrink it when the server gets slow."""
+    if elapsed < _PAGE_TARGET_SECONDS / 2:
+        return min(page_size * 2, _PAGE_SIZE_MAX)
+    if elapsed > _PAGE_TARGET_SECONDS:
+        return max(page_size // 2, _PAGE_SIZE_MIN)
+    return page_size
+
+
+def _top_level_fields(fields: str) -> List[str]:
+    """Split a `fields` projection like `idReadable,project(shortName)` into its top-level field names."""
+    names, depth, current = [], 0, ""
+    for char in fields:
+        if char == "," and depth == 0:
+            names.append(current.strip())
+            current = ""
+            continue
+        depth += {"(": 1, ")": -1}.get(char, 0)
+        current += char if depth == 0 and char != ")" else ""
+    names.append(current.strip())
+    return [name for name in names if name]
+
+
+def _split_ids(value: str) -> List[str]:
+    """Split comma- and/or whitespace-separated issue IDs or names."""
+    return [item for item in re.split(r"[\s,]+", value) if item]
+
+
+def _read_ids(path: str) -> List[str]:
+    """Read comma- and/or whitespace-separated issue IDs from a file, `-` reads stdin."""
+    if path == "-":
+        return _split_ids(sys.stdin.read())
+    with open(path, mode='r') as f:
+        return _split_ids(f.read())
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group an iterable into lists of up to `size` items without materializing it."""
+    chunk: List[Any] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _command_value(value: str) -> str:
+    """Quote a value of a YouTrack command, e.g. a tag name containing spaces."""
+    return f"{{{value}}}" if re.search(r"[\s{}]", value) else value
+
+
+def _custom_field_value(issue: Dict, name: str) -> Optional[str]:
+    """Name of the value of a custom field (e.g. `State`) of an issue fetched with `customFields(name,value(name))`."""
+    for field in issue.get("customFields", []):
+        if field.get("name") == name:
+            value = field.get("value")
+            return value.get("name") if isinstance(value, dict) else value
+    return None
+
+
+def _map_failures(func: Callable[[Any], Any], items: Iterable[Any], workers: int) -> Dict[Any, str]:
+    """Call `func` for all items in a thread pool and return the error of every failed item."""
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    failures: Dict[Any, str] = {}
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        futures = {executor.submit(func, item): item for item in items}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                failures[futures[future]] = str(e)
+    return failures
+
+
+def _comments_result(issues: Iterable[str], skipped: Iterable[str], failed: Dict[str, str]) -> Dict[str, Any]:
+    """Result of `add-comments`, the issues are listed in the order of the comments file."""
+    skipped = set(skipped)
+    return {
+        "commented": [issue for issue in issues if issue not in skipped and issue not in failed],
+        "skipped": [issue for issue in issues if issue in skipped],
+        "failed": dict(sorted(failed.items())),
+    }
+
+
+def _issue_body(project: str, summary: str, description: str = "", issue_type: str = "",
+                assignee_id: str = "") -> Dict[str, Any]:
+    """JSON body of a new issue."""
+    custom_fields = []
+    if issue_type:
+        custom_fields.append({
+            "name": "Type",
+            "$type": "SingleEnumIssueCustomField",
+            "value": {"name": issue_type}
+        })
+    if assignee_id:
+        custom_fields.append({
+            "name": "Assignee",
+            "$type": "SingleUserIssueCustomField",
+            "value": {"id": assignee_id}
+        })
+    return {
+        "project": {"shortName": project},
+        "summary": summary,
+        "description": description,
+        "customFields": custom_fields,
+    }
+
+
+def _read_issue_specs(issues_file: str) -> List[Dict[str, Any]]:
+    """Read the JSONL issue specs of a bulk create, `-` reads stdin."""
+    lines = sys.stdin if issues_file == "-" else open(issues_file, mode='r')
     try:
-        return request.urlopen(req).status
-    except HTTPError as e:
-        return e.status
+        return [json.loads(line) for line in lines if line.strip()]
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+
+
+def _spec_lookups(specs: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """The distinct ("assignee", login) and ("tag", name) lookups of bulk create issue specs."""
+    logins = {("assignee", spec["assignee"]) for spec in specs if spec.get("assignee")}
+    tags = {("tag", tag) for spec in specs for tag in _split_tags(_tag_list(spec.get("tags")))}
+    return sorted(logins | tags)
+
+
+def _plan_issue_specs(specs: List[Dict[str, Any]], lookup_errors: Dict[Tuple[str, str], str]
+                      ) -> Tuple[Dict[int, Tuple[str, str]], Dict[str, str]]:
+    """The (project, summary) of every line that can be created and the errors of the other lines.
+
+    `lookup_errors` holds the error of every `_spec_lookups` entry that could not be resolved.
+    """
+    keys: Dict[int, Tuple[str, str]] = {}
+    failed: Dict[str, str] = {}
+    for line, spec in enumerate(specs, start=1):
+        if not spec.get("project") or not spec.get("summary"):
+            failed[str(line)] = "project and summary are required"
+            continue
+        lookups = [("assignee", spec["assignee"])] if spec.get("assignee") else []
+        lookups += [("tag", tag) for tag in _split_tags(_tag_list(spec.get("tags")))]
+        errors = [lookup_errors[lookup] for lookup in lookups if lookup in lookup_errors]
+        if errors:
+            failed[str(line)] = "; ".join(errors)
+        else:
+            keys[line] = (spec["project"], spec["summary"])
+    return keys, failed
+
+
+def _first_lines(keys: Dict[int, Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+    """The first line of every (project, summary), later lines get the same issue."""
+    first_lines: Dict[Tuple[str, str], int] = {}
+    for line, key in keys.items():
+        first_lines.setdefault(key, line)
+    return first_lines
 
 
-def _get_json(req: request.Request) -> Any:
+def _lines_by_tags(specs: List[Dict[str, Any]], lines: Iterable[int]) -> Dict[str, List[int]]:
+    """Group the lines of created issues by their tags, lines without tags are left out."""
+    by_tags: Dict[str, List[int]] = {}
+    for line in lines:
+        tags = _tag_list(specs[line - 1].get("tags"))
+        if tags:
+            by_tags.setdefault(tags, []).append(line)
+    return by_tags
+
+
+def _issues_create_result(keys: Dict[int, Tuple[str, str]], first_lines: Dict[Tuple[str, str], int],
+                          issue_ids: Dict[int, str], created: Dict[int, bool],
+                          failed: Dict[str, str]) -> Dict[str, Any]:
+    """Result of `issues-create`: the issue of every line and the errors keyed by line number."""
+    issues = []
+    for line, key in keys.items():
+        issue_id = issue_ids.get(first_lines[key])
+        if issue_id:
+            issues.append({"line": line, "idReadable": issue_id, "created": created.get(line, False)})
+    return {"issues": issues, "failed": dict(sorted(failed.items(), key=lambda item: int(item[0])))}
+
+
+def _split_tags(tags: str) -> List[str]:
+    """Split comma-separated tag names, which may contain spaces."""
+    return [tag.strip() for tag in tags.split(",") if tag.strip()]
+
+
+def _tag_list(tags: Union[str, List[str], None]) -> str:
+    """Tags of an issue spec, given as comma-separated string or as list."""
+    return ",".join(tags) if isinstance(tags, list) else (tags or "")
+
+
+def _failures_by_issue(failures: Dict[Tuple[str, str], str]) -> Dict[str, str]:
+    """Join the errors of (issue, other) pairs into one error per issue."""
+    failed: Dict[str, str] = {}
+    for (issue_id, _), error in sorted(failures.items()):
+        failed[issue_id] = f"{failed[issue_id]}; {error}" if issue_id in failed else error
+    return failed
+
+
+def _has_failures(result: Any) -> bool:
+    """Whether a structured bulk result reports failed issues."""
+    return isinstance(result, dict) and bool(result.get("failed"))
+
+
+def _decompressor(content_encoding: Optional[str]) -> Optional[Any]:
+    """Streaming decompressor for a gzip or deflate `Content-Encoding`, `None` if the body is not compressed."""
+    if (content_encoding or "").strip().lower() in ("gzip", "x-gzip", "deflate"):
+        # accepts both gzip and zlib headers
+        return zlib.decompressobj(32 + zlib.MAX_WBITS)
+    return None
+
+
+def _iter_json_array(response: Any, chunk_size: int = _READ_CHUNK_SIZE) -> Iterator[Any]:
+    """Decode the items of a JSON array one by one while the response is read in chunks.
+
+    Only the current chunk and item are kept in memory, neither the whole body nor the whole list.
+    A response that is not exactly one JSON array raises `YouTrackError`.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    buffer, position, eof = "", 0, False
+    # expected next: "start" the opening bracket, "first" an item or the closing bracket,
+    # "next" a comma or the closing bracket, "item" an item, "end" nothing but whitespace
+    state = "start"
+    while True:
+        position = _JSON_WHITESPACE.match(buffer, position).end()
+        if position < len(buffer):
+            char = buffer[position]
+            if state == "start":
+                if char != "[":
+                    _fail("response is not a JSON array")
+                state, position = "first", position + 1
+                continue
+            if state == "end":
+                _fail("unexpected data after the JSON array response")
+            if char == "]" and state in ("first", "next"):
+                state, position = "end", position + 1
+                continue
+            if state == "next":
+                if char != ",":
+                    _fail(f"malformed JSON array response, expected ',' or ']' instead of {char!r}")
+                state, position = "item", position + 1
+                continue
+            if char in ",]":
+                _fail(f"malformed JSON array response, expected an item instead of {char!r}")
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise YouTrackError(f"malformed JSON array response: {e}") from e
+            else:
+                # a number is only complete once it is followed by a separator, it might continue in the next chunk
+                if eof or (end < len(buffer) and buffer[end] in ", \t\r\n]"):
+                    yield item
+                    state, position = "next", end
+                    continue
+        elif eof:
+            if state != "end":
+                _fail("incomplete JSON array response")
+            return
+        chunk = response.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[position:] + text.decode(chunk, final=eof)
+        position = 0
+
+
+def _retry_after(headers: Any) -> float:
+    """Seconds to wait according to a `Retry-After` header (delta seconds or HTTP date)."""
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return 0.0
     try:
-        response = request.urlopen(req)
-    except HTTPError as e:
-        body = e.read().decode() if e.readable() else ""
-        print(f"::warning::request `{req.full_url}` failed with status code {e.status}: {body}" if os.environ.get("CI") else f"WARNING: request `{req.full_url}` failed with status code {e.status}: {body}", file=sys.stderr)
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _backoff(attempt: int) -> float:
+    """Exponential backoff with jitter for the given (zero-based) retry attempt."""
+    import random
+    return min(_BACKOFF_BASE_SECONDS * 2 ** attempt, _BACKOFF_MAX_SECONDS) * random.uniform(0.5, 1.0)
+
+
+class _RateLimits:
+    """Client-wide token bucket combined with an adaptive limit of concurrent requests.
+
+    Throttled responses halve the request rate and the concurrency limit and pause all
+    requests for the `Retry-After` period, successful responses slowly raise both again.
+    Subclasses add the locking for threads or asyncio tasks.
+    """
+
+    def __init__(self, rate: float, max_concurrency: int) -> None:
+        self._max_rate = max(rate, _MIN_RATE)
+        self._rate = self._max_rate
+        self._tokens = self._max_rate
+        self._updated = time.monotonic()
+        self._max_concurrency = max(max_concurrency, 1)
+        self._concurrency = float(self._max_concurrency)
+        self._active = 0
+        self._paused_until = 0.0
+
+    def _try_acquire(self) -> Tuple[bool, Optional[float]]:
+        """Take a request slot if possible, otherwise return how long to wait (`None` until a release)."""
+        now = time.monotonic()
+        self._tokens = min(self._tokens + (now - self._updated) * self._rate, self._rate)
+        self._updated = now
+        if now < self._paused_until:
+            return False, self._paused_until - now
+        if self._active >= int(self._concurrency):
+            return False, None
+        if self._tokens < 1:
+            return False, (1 - self._tokens) / self._rate
+        self._tokens -= 1
+        self._active += 1
+        return True, None
+
+    def _release(self, throttled: bool, retry_after: float) -> None:
+        self._active -= 1
+        if throttled:
+            self._rate = max(self._rate / 2, _MIN_RATE)
+            self._concurrency = max(self._concurrency / 2, 1.0)
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        else:
+            self._rate = min(self._rate + self._max_rate / 100, self._max_rate)
+            self._concurrency = min(self._concurrency + 1 / self._concurrency, self._max_concurrency)
+
+
+class _RateLimiter(_RateLimits):
+    def __init__(self, rate: float, max_concurrency: int) -> None:
+        super().__init__(rate, max_concurrency)
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._condition:
+            acquired, timeout = self._try_acquire()
+            while not acquired:
+                self._condition.wait(timeout)
+                acquired, timeout = self._try_acquire()
+
+    def release(self, throttled: bool = False, retry_after: float = 0.0) -> None:
+        with self._condition:
+            self._release(throttled, retry_after)
+            self._condition.notify_all()
+
+
+def _issue_writer(output_format: str, fields: str) -> Callable[[Dict], None]:
+    """Return a function writing single issues to stdout as `ndjson` or `csv` (after writing the CSV header)."""
+    import csv
+
+    columns = _top_level_fields(fields)
+    writer = csv.writer(sys.stdout, lineterminator="\n")
+    if output_format == "csv":
+        writer.writerow(columns)
+
+    def write_issue(issue: Dict) -> None:
+        values = {column: issue.get(column) for column in columns}
+        if output_format == "csv":
+            writer.writerow(
+                value if value is None or isinstance(value, (str, int, float)) else json.dumps(value)
+                for value in values.values()
+            )
+        else:
+            print(json.dumps(values))
+
+    return write_issue
+
+
+class _MetadataCache:
+    """Thread-safe cache with TTL expiry for rarely changing lookups, optionally persisted to a JSON file."""
+
+    def __init__(self, ttl: float, path: Optional[str] = None) -> None:
+        self._ttl = ttl
+        self._path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, mode='r') as f:
+                    self._entries = {key: (expires, value) for key, (expires, value) in json.load(f).items()}
+            except (OSError, ValueError):
+                pass
+
+    def peek(self, key: str) -> Any:
+        """Return the cached value of `key` or `None` if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.time():
+            return entry[1]
         return None
-    else:
-        return json.loads(response.read())
 
+    def get(self, key: str, load: Callable[[], Any]) -> Any:
+        """Return the cached value of `key` or call `load` to fill it, `None` results are not cached."""
+        value = self.peek(key)
+        if value is not None:
+            return value
+        value = load()
+        if value is not None:
+            self.set(key, value)
+        return value
 
-def _assert_ok_status(req: request.Request) -> None:
-    try:
-        response = request.urlopen(req)
-        if 200 <= response.status < 300:
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + self._ttl, value)
+            self._save()
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Drop a single entry or, without `key`, the whole cache."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+            self._save()
+
+    def _save(self) -> None:
+        if not self._path:
             return
-        _fail(f"request `{req.full_url}` failed with status code {response.status}")
-    except HTTPError as e:
-        body = e.read().decode() if e.readable() else ""
-        _fail(f"request `{req.full_url}` failed with status code {e.status}: {body}")
+        now = time.time()
+        self._entries = {key: entry for key, entry in self._entries.items() if entry[0] > now}
+        tmp_path = f"{self._path}.{os.getpid()}.tmp"
+        with open(tmp_path, mode='w') as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self._path)
+
+
+def _default_cache_file(base_url: str) -> Optional[str]:
+    """Cache file below `RUNNER_TEMP`, so all steps of a GitHub Actions job share their lookups."""
+    runner_temp = os.environ.get("RUNNER_TEMP")
+    if not runner_temp:
+        return None
+    import hashlib
+
+    url_hash = hashlib.sha1(base_url.rstrip('/').encode()).hexdigest()[:12]
+    return os.path.join(runner_temp, f"youtrack-cache-{url_hash}.json")
+
+
+class _MultipartFiles:
+    """Re-iterable multipart/form-data body that streams the given files from disk in chunks."""
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, paths: Iterable[str], field_name: str = "file") -> None:
+        import mimetypes
+
+        self.boundary = os.urandom(16).hex()
+        self._parts: List[Tuple[bytes, str]] = []
+        for path in paths:
+            filename = os.path.basename(path).replace('"', '%22')
+            content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            header = (
+                f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="{field_name}"; filename="{filename}"\r\n'
+                f"Content-Type: {content_type}\r\n"
+                f"\r\n"
+            ).encode()
+            self._parts.append((header, os.path.abspath(path)))
+        self._trailer = f"--{self.boundary}--\r\n".encode()
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        return sum(len(header) + os.path.getsize(path) + 2 for header, path in self._parts) + len(self._trailer)
+
+    def __iter__(self) -> Iterator[bytes]:
+        for header, path in self._parts:
+            yield header
+            with open(path, mode='rb') as f:
+                yield from iter(lambda: f.read(self.chunk_size), b"")
+            yield b"\r\n"
+        yield self._trailer
+
+
+_TRACE_ID_SEGMENT = re.compile(r"[A-Za-z][A-Za-z0-9_]*-\d+|\d+-\d+[st]?")
+
+
+def _path_template(selector: str) -> str:
+    """Turn a request path into its endpoint, e.g. `/api/issues/SDK-1/tags?fields=id` into `api/issues/{id}/tags`."""
+    path = selector.split("?", 1)[0]
+    path = path[path.find("/api/") + 1:] if "/api/" in path else path.lstrip("/")
+    segments = path.split("/")
+    for index, segment in enumerate(segments):
+        if _TRACE_ID_SEGMENT.fullmatch(segment):
+            segments[index] = "{id}"
+        elif index and segments[index - 1] == "users":
+            segments[index] = "{login}"
+    return "/".join(segments)
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)] if ordered else 0.0
+
+
+class _Tracer:
+    """Records all HTTP requests of a run for a JSON trace and a markdown summary."""
+
+    def __init__(self, command: str) -> None:
+        self.command = command
+        self._started = time.monotonic()
+        self._requests: List[Dict[str, Any]] = []
+        self._waits: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, method: str, selector: str, status: int, bytes_sent: int, bytes_received: int,
+               connect: Optional[float], latency: float) -> None:
+        with self._lock:
+            self._requests.append({
+                "method": method,
+                "endpoint": _path_template(selector),
+                "status": status,
+                "bytes_sent": bytes_sent,
+                "bytes_received": bytes_received,
+                "connect": connect,
+                "latency": latency,
+            })
+
+    def add_wait(self, reason: str, seconds: float) -> None:
+        with self._lock:
+            self._waits[reason] = self._waits.get(reason, 0.0) + seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "command": self.command,
+                "wall_time": time.monotonic() - self._started,
+                "waits": dict(self._waits),
+                "requests": list(self._requests),
+            }
+
+    def write_trace(self, path: str) -> None:
+        """Append the trace as one JSON line, so all steps of a job can share one trace file."""
+        with open(path, mode='a') as f:
+            f.write(json.dumps(self.to_dict()) + "\n")
+
+    def summary(self) -> str:
+        trace = self.to_dict()
+        requests = trace["requests"]
+        connects = [r["connect"] for r in requests if r["connect"] is not None]
+        lines = [
+            f"### YouTrack `{self.command}`",
+            "",
+            f"{len(requests)} requests in {trace['wall_time']:.2f} s wall time, "
+            f"{len(connects)} new connections ({sum(connects):.2f} s connecting)"
+            + "".join(f", {seconds:.2f} s waiting for {reason}" for reason, seconds in trace["waits"].items()),
+            "",
+            "| Endpoint | Requests | Errors | Received | p50 | p95 |",
+            "|---|---:|---:|---:|---:|---:|",
+        ]
+        endpoints: Dict[str, List[Dict[str, Any]]] = {}
+        for r in requests:
+            endpoints.setdefault(f"{r['method']} {r['endpoint']}", []).append(r)
+        for endpoint, calls in sorted(endpoints.items(), key=lambda item: -sum(r["latency"] for r in item[1])):
+            latencies = [r["latency"] for r in calls]
+            lines.append(
+                f"| `{endpoint}` | {len(calls)} | {sum(1 for r in calls if r['status'] >= 400)} "
+                f"| {sum(r['bytes_received'] for r in calls) / 1024:.1f} KiB "
+                f"| {_percentile(latencies, 50) * 1000:.0f} ms | {_percentile(latencies, 95) * 1000:.0f} ms |"
+            )
+        return "\n".join(lines) + "\n"
+
+    def write_summary(self, path: str) -> None:
+        with open(path, mode='a') as f:
+            f.write(self.summary())
+
+
+class _Request:
+    """HTTP request to a YouTrack URL, a lightweight stand-in for `urllib.request.Request`."""
+
+    def __init__(self, url: str, method: Optional[str] = None, headers: Optional[Dict[str, str]] = None,
+                 data: Union[bytes, Iterable[bytes], None] = None) -> None:
+        self.full_url = url
+        self.method = method or ("GET" if data is None else "POST")
+        self.headers = headers or {}
+        self.data = data
+        parts = urlsplit(url)
+        self.selector = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+    def get_method(self) -> str:
+        return self.method
+
+    def header_items(self) -> List[Tuple[str, str]]:
+        return list(self.headers.items())
+
+
+class _HTTPError(Exception):
+    """Response with a status code >= 400, its body can still be read like with `urllib.error.HTTPError`."""
+
+    def __init__(self, url: str, response: "_PooledResponse") -> None:
+        super().__init__(f"HTTP Error {response.status}: {response.reason}")
+        self.url = url
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+        self._response = response
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        return self._response.read(amt)
+
+    def readable(self) -> bool:
+        return self._response.readable()
+
+
+class _PooledResponse:
+    """HTTP response that hands its connection back to the pool once the body is consumed."""
+
+    def __init__(self, pool: "_ConnectionPool", connection: HTTPConnection, response: HTTPResponse,
+                 on_complete: Optional[Callable[[int], None]] = None) -> None:
+        self._pool = pool
+        self._connection: Optional[HTTPConnection] = connection
+        self._response = response
+        self._on_complete = on_complete
+        self._bytes_received = 0
+        self._decompressor = _decompressor(response.headers.get("Content-Encoding"))
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        """Read (and decompress) up to `amt` bytes of the body from the wire, `b""` only at its end."""
+        while True:
+            data = self._response.read(amt)
+            self._bytes_received += len(data)
+            done = not data or self._response.isclosed()
+            if self._decompressor is not None:
+                data = self._decompressor.decompress(data) + (self._decompressor.flush() if done else b"")
+            if done:
+                # reading again after the end returns b"" instead of flushing twice
+                self._decompressor = None
+                self._release()
+            if data or done:
+                return data
+
+    def close(self) -> None:
+        if self._connection is not None and not self._response.isclosed():
+            # the unread rest of the body is still on the wire, so the connection cannot be reused
+            self._connection.close()
+            self._connection = None
+            self._complete()
+        self._response.close()
+
+    def _release(self) -> None:
+        if self._connection is not None:
+            self._pool.put(self._connection, reusable=not self._response.will_close)
+            self._connection = None
+            self._complete()
+
+    def _complete(self) -> None:
+        if self._on_complete is not None:
+            self._on_complete(self._bytes_received)
+            self._on_complete = None
+
+    def __enter__(self) -> "_PooledResponse":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def _proxy_address(proxy: str) -> Tuple[str, Dict[str, str]]:
+    """Host and port of a proxy URL and the headers authenticating with its credentials."""
+    import base64
+    from urllib.parse import unquote
+
+    url = urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+    headers = {}
+    if url.username is not None:
+        credentials = f"{unquote(url.username)}:{unquote(url.password or '')}".encode()
+        headers["Proxy-Authorization"] = f"Basic {base64.b64encode(credentials).decode()}"
+    return f"{url.hostname}:{url.port or 80}", headers
+
+
+class _ConnectionPool:
+    """Thread-safe pool of keep-alive connections to the host of a base URL.
+
+    Like `urllib.request`, the proxy of the `HTTP_PROXY`/`HTTPS_PROXY` environment variables is
+    used unless `NO_PROXY` excludes the host, HTTPS requests are tunneled through it with CONNECT.
+    """
+
+    def __init__(self, base_url: str, maxsize: int = 10, timeout: float = 60,
+                 tracer: Optional[_Tracer] = None) -> None:
+        from urllib.request import getproxies, proxy_bypass
+
+        url = urlsplit(base_url)
+        self._connection_class = HTTPSConnection if url.scheme == "https" else HTTPConnection
+        self._netloc = url.netloc
+        proxy = getproxies().get(url.scheme)
+        self._proxy = _proxy_address(proxy) if proxy and not proxy_bypass(url.hostname or "") else None
+        # a plain HTTP proxy gets requests for absolute URLs, HTTPS is tunneled
+        self._forward_proxy = self._proxy is not None and url.scheme != "https"
+        self._maxsize = maxsize
+        self._timeout = timeout
+        self._tracer = tracer
+        self._idle: List[HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def urlopen(self, req: _Request) -> _PooledResponse:
+        """Send `req` like `urllib.request.urlopen` does, raising `_HTTPError` for status codes >= 400."""
+        headers = {"Connection": "keep-alive", "Accept-Encoding": _ACCEPT_ENCODING, **dict(req.header_items())}
+        while True:
+            connection, reused = self.get()
+            started = time.monotonic()
+            connect_time = None
+            try:
+                if not reused:
+                    connection.connect()
+                    connect_time = time.monotonic() - started
+                if self._forward_proxy:
+                    connection.request(req.get_method(), req.full_url, body=req.data,
+                                       headers={**self._proxy[1], **headers})
+                else:
+                    connection.request(req.get_method(), req.selector, body=req.data, headers=headers)
+                response = connection.getresponse()
+            except (RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                connection.close()
+                if reused:
+                    # the server dropped the idle keep-alive connection, retry on a fresh one
+                    continue
+                raise
+            except BaseException:
+                connection.close()
+                raise
+            break
+
+        on_complete = None
+        if self._tracer is not None:
+            tracer = self._tracer
+            bytes_sent = len(req.data) if req.data is not None else 0
+
+            def on_complete(bytes_received: int) -> None:
+                tracer.record(req.get_method(), req.selector, response.status, bytes_sent, bytes_received,
+                              connect_time, time.monotonic() - started)
+
+        pooled_response = _PooledResponse(self, connection, response, on_complete)
+        if pooled_response.status >= 400:
+            raise _HTTPError(req.full_url, pooled_response)
+        return pooled_response
+
+    def get(self) -> Tuple[HTTPConnection, bool]:
+        """Check out an idle connection or open a new one, returns the connection and whether it was reused."""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        if self._proxy is None:
+            return self._connection_class(self._netloc, timeout=self._timeout), False
+        proxy_netloc, proxy_headers = self._proxy
+        connection = self._connection_class(proxy_netloc, timeout=self._timeout)
+        if not self._forward_proxy:
+            connection.set_tunnel(self._netloc, headers=proxy_headers)
+        return connection, False
+
+    def put(self, connection: HTTPConnection, reusable: bool = True) -> None:
+        with self._lock:
+            if reusable and len(self._idle) < self._maxsize:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
 
 
 class YouTrack:
-    def __init__(self, base_url: str, token: str) -> None:
+    def __init__(self, base_url: str, token: str,
+                 cache_ttl: float = 3600, cache_file: Optional[str] = None,
+                 rate: float = 50, max_concurrency: int = 16, max_retries: int = 5,
+                 tracer: Optional[_Tracer] = None) -> None:
         self.base_url = base_url.rstrip('/')
         self.token = token
+        self._tracer = tracer
+        self._pool = _ConnectionPool(self.base_url, maxsize=max_concurrency, tracer=tracer)
+        self._limiter = _RateLimiter(rate, max_concurrency)
+        self._max_retries = max_retries
+        self._cache = _MetadataCache(cache_ttl, cache_file)
+
+    def close(self) -> None:
+        """Close all idle keep-alive connections."""
+        self._pool.close()
+
+    def clear_cache(self, key: Optional[str] = None) -> None:
+        """Invalidate a cached lookup (e.g. `tag-ids`) or the whole metadata cache."""
+        self._cache.invalidate(key)
 
     def add_attachment(self, issue: str, path: str) -> None:
-        check_call([
-            "curl",
-            "--header", f"Authorization: Bearer {self.token}",
-            "--request", "POST",
-            "--form", f"file=@{os.path.abspath(path)}",
-            f"{self.base_url}/api/issues/{issue}/attachments",
-        ])
-
-    def add_comments(self, comments_file: str) -> None:
+        self.add_attachments(issue, [path])
+
+    def add_attachments(self, issue: str, paths: List[str]) -> None:
+        """Upload files to an issue in a single request, streaming them from disk."""
+        body = _MultipartFiles(paths)
+        self._assert_ok_status(self._request(
+            f"api/issues/{issue}/attachments",
+            method="POST",
+            headers={"Content-Type": body.content_type, "Content-Length": str(len(body))},
+            data=body,
+        ))
+
+    def add_comments(self, comments_file: str, workers: int = 1) -> Dict[str, Any]:
+        """Post the comments of a comments file, handling up to `workers` issues in parallel.
+
+        The attachments of an issue are always uploaded before its comment is posted.
+        Failing issues do not stop the others. Returns the commented issues, the skipped
+        issues that do not exist and the error of every failed issue.
+        """
         with open(comments_file, mode='r') as cf:
             comments = json.load(cf)
+        skipped: List[str] = []
 
-        for issue, comment in comments.items():
+        def add_issue_comment(issue: str, comment: Any) -> None:
             if isinstance(comment, dict):
                 attachments = comment.get('attachments', [])
                 comment = comment.get('comment', '')
             else:
                 attachments = []
-            for attachment in attachments:
-                self.add_attachment(issue, attachment)
-            self.add_comment(issue, comment)
+            if attachments:
+                self.add_attachments(issue, attachments)
+            if not self._post_comment(issue, comment):
+                skipped.append(issue)
+
+        failed = _map_failures(lambda issue: add_issue_comment(issue, comments[issue]), comments, workers)
+        return _comments_result(comments, skipped, failed)
 
     def add_comment(self, issue: str, comment: str) -> None:
+        self._post_comment(issue, comment)
+
+    def _post_comment(self, issue: str, comment: str) -> bool:
+        """Post a comment, returns False if the issue does not exist."""
         req = self._request(
             f"api/issues/{issue}/comments",
             headers={"Content-Type": "application/json"},
             data=json.dumps({"text": comment}).encode(),
         )
-        status_code = _get_status_code(req)
+        status_code = self._get_status_code(req)
         if status_code == 404:
             print(f"::warning::issue {issue} not found, skipping comment", file=sys.stderr)
-            return
+            return False
         if 200 <= status_code < 300:
-            return
+            return True
         _fail(f"request `{req.full_url}` failed with status code {status_code}")
 
-    def get_issue(self, issue: str) -> Any:
-        return _get_json(self._request(f"api/issues/{issue}?fields=id,idReadable"))
+    def get_issue(self, issue: str, fields: str = "id,idReadable") -> Any:
+        return self._get_json(self._request(f"api/issues/{issue}?fields={fields}"))
 
     def get_fix_version_bundle_id(self, project: str) -> Optional[str]:
         """Auto-discover the bundle ID for the 'Fix versions' field from project settings."""
-        issues = _get_json(self._request(
+        return self._cache.get(f"fix-version-bundle:{project}",
+                               lambda: self._fetch_fix_version_bundle_id(project))
+
+    def _fetch_fix_version_bundle_id(self, project: str) -> Optional[str]:
+        issues = self._get_json(self._request(
             f"api/issues?query=project:{project}&fields=customFields(name,projectCustomField(bundle(id)))&$top=1"
         ))
         if issues:
@@ -121,32 +941,44 @@ class YouTrack:
                         return bundle.get("id")
         return None
 
-    def get_version(self, project: str, version: str) -> Any:
+    def get_version(self, project: str, version: str, fields: str = "id,name") -> Any:
         """Get version info by looking up the bundle from project's Fix versions field."""
         bundle_id = self.get_fix_version_bundle_id(project)
         if not bundle_id:
             return None
+        return self.find_version(bundle_id, version, fields=fields)
 
-        versions = _get_json(self._request(
-            f"api/admin/customFieldSettings/bundles/version/{bundle_id}/values?fields=id,name&$top=-1"
-        ))
-        if versions:
-            for version_data in versions:
+    def find_version(self, bundle_id: str, version: str, page_size: int = 100,
+                     fields: str = "id,name") -> Optional[Dict]:
+        """Find a version by name in a version bundle.
+
+        The values are filtered by name on the server and paged, so the lookup stops at the
+        first exact match instead of downloading the whole bundle. `fields` has to include `name`.
+        """
+        skip = 0
+        while True:
+            values = list(self._iter_json(self._request(
+                f"api/admin/customFieldSettings/bundles/version/{bundle_id}/values"
+                f"?fields={fields}&query={quote(version)}&$top={page_size}&$skip={skip}"
+            )))
+            for version_data in values:
                 if version_data.get("name") == version:
                     return version_data
-        return None
+            if len(values) < page_size:
+                return None
+            skip += page_size
 
     def release_version(self, project: str, version: str) -> None:
         bundle_id = self.get_fix_version_bundle_id(project)
         if not bundle_id:
             _fail(f"could not find Fix versions bundle for project {project}")
 
-        version_data = self.get_version(project, version)
+        version_data = self.find_version(bundle_id, version)
         if version_data is None:
             _fail(f"version {version} in project {project} does not exist")
 
-        release_date_ms = int(datetime.datetime.now().timestamp() * 1000)
-        _assert_ok_status(
+        release_date_ms = int(time.time() * 1000)
+        self._assert_ok_status(
             self._request(
                 f"api/admin/customFieldSettings/bundles/version/{bundle_id}/values/{version_data['id']}",
                 method="POST",
@@ -160,14 +992,34 @@ class YouTrack:
 
     def get_user(self, login: str) -> Optional[Dict]:
         """Get a YouTrack user by login."""
-        return _get_json(self._request(
+        return self._cache.get(f"user:{login}", lambda: self._get_json(self._request(
             f"api/users/{quote(login)}?fields=id,login"
-        ))
+        )))
+
+    def get_user_ids(self) -> Dict[str, str]:
+        """Get all users as {login: id} map."""
+        return self._cache.get("user-ids", self._fetch_user_ids)
+
+    def _fetch_user_ids(self) -> Dict[str, str]:
+        users = {u["login"]: u["id"] for u in self._iter_json(self._request("api/users?fields=id,login&$top=-1"))}
+        if not users:
+            _fail("failed to retrieve users")
+        return users
+
+    def get_user_id(self, login: str) -> str:
+        """Get the ID of a user by login, refreshing the cached users once if the login is unknown."""
+        user_id = self.get_user_ids().get(login)
+        if user_id is None:
+            self._cache.invalidate("user-ids")
+            user_id = self.get_user_ids().get(login)
+        if user_id is None:
+            _fail(f"user with login {login} not found")
+        return user_id
 
     def search_issues(self, project: str, summary: str) -> Optional[Dict]:
         """Search for an issue by exact summary in a project."""
         query = quote(f'project: {{{project}}} summary: {summary}')
-        issues = _get_json(self._request(
+        issues = self._get_json(self._request(
             f"api/issues?query={query}&fields=idReadable,summary&$top=10"
         ))
         if issues:
@@ -185,30 +1037,15 @@ class YouTrack:
             if existing:
                 return existing
 
-        custom_fields = []
-        if issue_type:
-            custom_fields.append({
-                "name": "Type",
-                "$type": "SingleEnumIssueCustomField",
-                "value": {"name": issue_type}
-            })
+        assignee_id = ""
         if assignee:
             user = self.get_user(assignee)
             if not user:
                 _fail(f"user with login {assignee} not found")
-            custom_fields.append({
-                "name": "Assignee",
-                "$type": "SingleUserIssueCustomField",
-                "value": {"id": user["id"]}
-            })
+            assignee_id = user["id"]
 
-        body: Dict = {
-            "project": {"shortName": project},
-            "summary": summary,
-            "description": description,
-            "customFields": custom_fields,
-        }
-        result = _get_json(self._request(
+        body = _issue_body(project, summary, description, issue_type, assignee_id)
+        result = self._get_json(self._request(
             "api/issues?fields=idReadable",
             method="POST",
             headers={"Content-Type": "application/json"},
@@ -217,105 +1054,356 @@ class YouTrack:
         if not result:
             _fail("failed to create issue")
         if tags:
-            self.issue_tag(result["idReadable"], tags)
+            tagged = self.issue_tag(result["idReadable"], tags)
+            if tagged["failed"]:
+                _fail(f"failed to tag issue {result['idReadable']}: {tagged['failed'][result['idReadable']]}")
         return result
 
+    def get_summary_index(self, project: str) -> Dict[str, str]:
+        """Map the summaries of all issues of a project to their IDs, fetched with one streamed search."""
+        return {issue["summary"]: issue["idReadable"]
+                for issue in self.iter_issues(f"project: {{{project}}}", "idReadable,summary")}
+
+    def issues_create(self, issues_file: str = "-", deduplicate: bool = False, workers: int = 8) -> Dict[str, Any]:
+        """Create the issues of a JSONL file, one `issue-create` spec per line.
+
+        Every line holds `project` and `summary` and optionally `description`, `type`, `tags`
+        and `assignee`. Assignees and tags are resolved once, a line with an unknown assignee or
+        tag fails without stopping the others. Duplicates are detected with one
+        summary index per project, and the missing issues are created with up to `workers`
+        concurrent requests and tagged with one command request per tag set. Returns the ID of
+        every line and the errors of the lines that failed, keyed by line number.
+        """
+        specs = _read_issue_specs(issues_file)
+        issue_ids: Dict[int, str] = {}
+        created: Dict[int, bool] = {}
+
+        # an unknown assignee or tag only fails the lines using it
+        lookup_errors: Dict[Tuple[str, str], str] = {}
+        for kind, name in _spec_lookups(specs):
+            try:
+                self.get_user_id(name) if kind == "assignee" else self.get_tag_id(name)
+            except YouTrackError as e:
+                lookup_errors[(kind, name)] = str(e)
+        keys, failed = _plan_issue_specs(specs, lookup_errors)
+        first_lines = _first_lines(keys)
+
+        if deduplicate:
+            for project in {project for project, _ in first_lines}:
+                index = self.get_summary_index(project)
+                for (spec_project, summary), line in first_lines.items():
+                    if spec_project == project and summary in index:
+                        issue_ids[line] = index[summary]
+        pending = [line for line in first_lines.values() if line not in issue_ids]
+
+        def create(line: int) -> None:
+            spec = specs[line - 1]
+            assignee_id = self.get_user_id(spec["assignee"]) if spec.get("assignee") else ""
+            result = self._get_json(self._request(
+                "api/issues?fields=idReadable",
+                method="POST",
+                headers={"Content-Type": "application/json"},
+                data=json.dumps(_issue_body(spec["project"], spec["summary"], spec.get("description", ""),
+                                            spec.get("type", ""), assignee_id)).encode()
+            ))
+            if not result:
+                _fail("failed to create issue")
+            issue_ids[line] = result["idReadable"]
+            created[line] = True
+
+        for line, error in _map_failures(create, pending, workers).items():
+            failed[str(line)] = error
+
+        for tags, lines in _lines_by_tags(specs, created).items():
+            tag_failures = self.issue_tag(",".join(issue_ids[line] for line in lines), tags)["failed"]
+            for line in lines:
+                if issue_ids[line] in tag_failures:
+                    failed[str(line)] = f"created {issue_ids[line]} but failed to tag it: " \
+                                        f"{tag_failures[issue_ids[line]]}"
+        return _issues_create_result(keys, first_lines, issue_ids, created, failed)
+
     def get_tag_ids(self) -> Dict[str, str]:
         """Get all issue tags as {name: id} map."""
-        tags = _get_json(self._request(
+        return self._cache.get("tag-ids", self._fetch_tag_ids)
+
+    def _fetch_tag_ids(self) -> Dict[str, str]:
+        tags = {t["name"]: t["id"] for t in self._iter_json(self._request(
             "api/issueTags?fields=id,name&$top=-1"
-        ))
+        ))}
         if not tags:
             _fail("failed to retrieve issue tags")
-        return {t["name"]: t["id"] for t in tags}
-
-    def issue_tag(self, issue: str, tags: str) -> None:
-        """Add tags to issues (comma-separated issue IDs and tag names)."""
-        tag_ids = self.get_tag_ids()
-        for issue_id in issue.split(","):
-            issue_id = issue_id.strip()
-            if not issue_id:
-                continue
-            for tag in tags.split(","):
-                tag = tag.strip()
-                if not tag:
-                    continue
-                _assert_ok_status(self._request(
-                    f"api/issues/{issue_id}/tags",
-                    method="POST",
-                    headers={"Content-Type": "application/json"},
-                    data=json.dumps({"id": tag_ids[tag]}).encode()
-                ))
-
-    def issue_watch(self, issue: str, logins: str) -> None:
-        """Add watchers to an issue by logins (comma-separated)."""
-        for login in logins.split(","):
-            login = login.strip()
-            if not login:
-                continue
-            user = self.get_user(login)
-            if not user:
-                _fail(f"user with login {login} not found")
-            _assert_ok_status(self._request(
-                f"api/issues/{issue}/watchers/issueWatchers",
+        return tags
+
+    def get_tag_id(self, tag: str) -> str:
+        """Get the ID of a tag, refreshing the cached tags once if the name is unknown."""
+        tag_id = self.get_tag_ids().get(tag)
+        if tag_id is None:
+            self._cache.invalidate("tag-ids")
+            tag_id = self.get_tag_ids().get(tag)
+        if tag_id is None:
+            _fail(f"tag {tag} not found")
+        return tag_id
+
+    def iter_issue_ids(self, issue: str = "", issues_file: Optional[str] = None,
+                       query: Optional[str] = None) -> Iterator[str]:
+        """Yield the distinct issue IDs given directly, in a file and/or matched by a search query."""
+        if not (issue or issues_file or query):
+            _fail("no issues given, use --issue, --issues-file or --query")
+        sources: List[Iterable[str]] = [_split_ids(issue)]
+        if issues_file:
+            sources.append(_read_ids(issues_file))
+        if query:
+            sources.append(found["idReadable"] for found in self.iter_issues(query))
+        seen = set()
+        for source in sources:
+            for issue_id in source:
+                if issue_id.upper() not in seen:
+                    seen.add(issue_id.upper())
+                    yield issue_id
+
+    def apply_command(self, issue_ids: List[str], command: str) -> Dict[str, str]:
+        """Apply a YouTrack command (e.g. `tag release`) to issues with a single request.
+
+        If the request fails, the issues are bisected until the failing ones are isolated.
+        Returns the error of every issue the command could not be applied to.
+        """
+        try:
+            self._assert_ok_status(self._request(
+                "api/commands",
                 method="POST",
                 headers={"Content-Type": "application/json"},
-                data=json.dumps({"user": {"id": user["id"]}, "isStarred": True}).encode()
+                data=json.dumps({
+                    "query": command,
+                    "issues": [{"idReadable": issue_id} for issue_id in issue_ids],
+                }).encode()
             ))
+            return {}
+        except YouTrackError as e:
+            if len(issue_ids) == 1:
+                return {issue_ids[0]: str(e)}
+        middle = len(issue_ids) // 2
+        return {**self.apply_command(issue_ids[:middle], command),
+                **self.apply_command(issue_ids[middle:], command)}
+
+    def issue_tag(self, issue: str = "", tags: str = "", issues_file: Optional[str] = None,
+                  query: Optional[str] = None) -> Dict[str, Any]:
+        """Add tags to issues (comma-separated issue IDs and tag names).
+
+        The issues can also be read from a file or found by a search query. All tags are added
+        with one command request per `_COMMAND_CHUNK_SIZE` issues. Returns the tagged issues and
+        the error of every issue that could not be tagged.
+        """
+        tag_names = _split_tags(tags)
+        if not tag_names:
+            _fail("no tags given")
+        for tag in tag_names:
+            self.get_tag_id(tag)
+        command = " ".join(f"tag {_command_value(tag)}" for tag in tag_names)
+
+        tagged: List[str] = []
+        failed: Dict[str, str] = {}
+        # all matches are collected first, tagging could drop issues from later pages of the query
+        issue_ids = list(self.iter_issue_ids(issue, issues_file, query))
+        for chunk in _chunks(issue_ids, _COMMAND_CHUNK_SIZE):
+            failures = self.apply_command(chunk, command)
+            failed.update(failures)
+            tagged.extend(issue_id for issue_id in chunk if issue_id not in failures)
+        return {"tagged": tagged, "failed": failed}
+
+    def issue_watch(self, issue: str = "", logins: str = "", issues_file: Optional[str] = None,
+                    query: Optional[str] = None, workers: int = 8) -> Dict[str, Any]:
+        """Add watchers to issues by logins (comma-separated issue IDs and logins).
+
+        All logins are resolved with one (cached) users request, the watchers are then added
+        with up to `workers` concurrent requests. Returns the watched issues and the errors of
+        every issue that could not be watched by all logins.
+        """
+        user_ids = [self.get_user_id(login) for login in _split_ids(logins)]
+        if not user_ids:
+            _fail("no logins given")
+        issue_ids = list(self.iter_issue_ids(issue, issues_file, query))
+
+        def add_watcher(issue_and_user: Tuple[str, str]) -> None:
+            issue_id, user_id = issue_and_user
+            self._assert_ok_status(self._request(
+                f"api/issues/{issue_id}/watchers/issueWatchers",
+                method="POST",
+                headers={"Content-Type": "application/json"},
+                data=json.dumps({"user": {"id": user_id}, "isStarred": True}).encode()
+            ))
+
+        failed = _failures_by_issue(
+            _map_failures(add_watcher, [(i, u) for i in issue_ids for u in user_ids], workers))
+        return {"watched": [issue_id for issue_id in issue_ids if issue_id not in failed], "failed": failed}
 
     def get_link_type_ids(self) -> Dict[str, str]:
         """Get all issue link types as {name: id} map."""
-        link_types = _get_json(self._request(
+        return self._cache.get("link-type-ids", self._fetch_link_type_ids)
+
+    def _fetch_link_type_ids(self) -> Dict[str, str]:
+        link_types = {lt["name"]: lt["id"] for lt in self._iter_json(self._request(
             "api/issueLinkTypes?fields=id,name"
-        ))
+        ))}
         if not link_types:
             _fail("failed to retrieve issue link types")
-        return {lt["name"]: lt["id"] for lt in link_types}
+        return link_types
+
+    def get_link_type_id(self, name: str) -> str:
+        """Get the ID of a link type, refreshing the cached link types once if the name is unknown."""
+        link_type_id = self.get_link_type_ids().get(name)
+        if link_type_id is None:
+            self._cache.invalidate("link-type-ids")
+            link_type_id = self.get_link_type_ids().get(name)
+        if link_type_id is None:
+            _fail(f"link type {name} not found")
+        return link_type_id
+
+    def get_project_keys(self) -> List[str]:
+        """Get the short names of all projects, e.g. to tell issue IDs from tokens like `SHA-256`."""
+        return self._cache.get("project-keys", self._fetch_project_keys)
 
-    def issue_link(self, issue: str, link_type: str, links: str) -> None:
-        """Link an issue to other issues."""
+    def _fetch_project_keys(self) -> List[str]:
+        project_keys = sorted(p["shortName"] for p in self._iter_json(self._request(
+            "api/admin/projects?fields=shortName&$top=-1"
+        )))
+        if not project_keys:
+            _fail("failed to retrieve projects")
+        return project_keys
+
+    def issue_link(self, issue: str = "", link_type: str = "relates-to", links: str = "",
+                   issues_file: Optional[str] = None, query: Optional[str] = None,
+                   workers: int = 8) -> Dict[str, Any]:
+        """Link issues to other issues.
+
+        The target issues are resolved with one search request per `_COMMAND_CHUNK_SIZE` IDs,
+        the links of all source issues are then added with up to `workers` concurrent requests.
+        Returns the linked issues and the errors of every issue that could not be linked.
+        """
         yt_name, direction = _LINK_TYPE_MAP[link_type]
-        link_type_id = self.get_link_type_ids()[yt_name]
+        link_type_id = self.get_link_type_id(yt_name)
         # Direction suffix: added issues go on opposite side
         # OUTWARD = {issue} -> {links}, so links are targets (t)
         # INWARD = {links} -> {issue}, so links are sources (s)
         dir_suffix = {"OUTWARD": "t", "INWARD": "s", "BOTH": ""}[direction]
 
-        for target in links.split(","):
-            target = target.strip()
-            if not target:
-                continue
-            # Resolve target issue database ID
-            target_issue = self.get_issue(target)
-            if not target_issue:
-                _fail(f"issue {target} not found")
-            _assert_ok_status(self._request(
-                f"api/issues/{issue}/links/{link_type_id}{dir_suffix}/issues",
+        targets = _split_ids(links)
+        if not targets:
+            _fail("no links given")
+        target_ids = {found["idReadable"].upper(): found["id"]
+                      for found in self.iter_issues_by_id(targets, "id,idReadable")}
+        missing = [target for target in targets if target.upper() not in target_ids]
+        if missing:
+            _fail(f"issue {', '.join(missing)} not found")
+        issue_ids = list(self.iter_issue_ids(issue, issues_file, query))
+
+        def add_link(issue_and_target: Tuple[str, str]) -> None:
+            issue_id, target_id = issue_and_target
+            self._assert_ok_status(self._request(
+                f"api/issues/{issue_id}/links/{link_type_id}{dir_suffix}/issues",
                 method="POST",
                 headers={"Content-Type": "application/json"},
-                data=json.dumps({"id": target_issue["id"]}).encode()
+                data=json.dumps({"id": target_id}).encode()
             ))
 
-    def issue_search(self, query: str) -> list:
-        """Search for issues by query, returns list of issue IDs."""
-        all_issues = []
-        skip = 0
-        batch_size = 50
-        while True:
-            issues = _get_json(self._request(
-                f"api/issues?query={quote(query)}&fields=idReadable&$top={batch_size}&$skip={skip}"
-            ))
-            if not issues:
-                break
-            all_issues.extend(issue["idReadable"] for issue in issues)
-            if len(issues) < batch_size:
-                break
-            skip += batch_size
-        return all_issues
+        failed = _failures_by_issue(
+            _map_failures(add_link, [(i, t) for i in issue_ids for t in target_ids.values()], workers))
+        return {"linked": [issue_id for issue_id in issue_ids if issue_id not in failed], "failed": failed}
+
+    def iter_issues(self, query: str, fields: str = "idReadable", page_size: int = 50) -> Iterator[Dict]:
+        """Stream the issues matching a query.
+
+        The next page is already fetched while the current one is consumed. The page size
+        adapts to the response time of the server.
+        """
+        def fetch_page(skip: int, top: int) -> Tuple[List[Dict], float]:
+            started = time.monotonic()
+            issues = list(self._iter_json(self._request(
+                f"api/issues?query={quote(query)}&fields={fields}&$top={top}&$skip={skip}"
+            )))
+            return issues, time.monotonic() - started
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            skip, top = 0, page_size
+            next_page = executor.submit(fetch_page, skip, top)
+            while True:
+                issues, elapsed = next_page.result()
+                if len(issues) < top:
+                    yield from issues
+                    return
+                skip += top
+                top = _next_page_size(top, elapsed)
+                next_page = executor.submit(fetch_page, skip, top)
+                yield from issues
+
+    def issue_search(self, query: str, output_format: str = "json", fields: str = "idReadable") -> Optional[list]:
+        """Search for issues by query.
+
+        With the `json` format the list of issue IDs is returned. The `ndjson` and `csv` formats
+        write the requested fields of each issue to stdout as soon as its page arrives.
+        """
+        if output_format == "json":
+            return [issue["idReadable"] for issue in self.iter_issues(query)]
+
+        write_issue = _issue_writer(output_format, fields)
+        for issue in self.iter_issues(query, fields):
+            write_issue(issue)
+        return None
+
+    def iter_issues_by_id(self, issue_ids: Iterable[str], fields: str = "idReadable") -> Iterator[Dict]:
+        """Stream issues by ID with one search request per `_COMMAND_CHUNK_SIZE` IDs, unknown IDs are left out."""
+        for chunk in _chunks(issue_ids, _COMMAND_CHUNK_SIZE):
+            # one more than can match, so that no second page is requested
+            yield from self.iter_issues(f"issue id: {', '.join(chunk)}", fields, page_size=len(chunk) + 1)
+
+    def issue_close(self, issue: str = "", resolution: str = "done", issues_file: Optional[str] = None,
+                    query: Optional[str] = None) -> Dict[str, Any]:
+        """Close issues with one of the resolutions of `_RESOLUTION_MAP`.
+
+        The issues are given by ID and/or found by a search query. Their states are read from
+        the search results, so issues already in the target state are skipped without extra
+        requests, the others are closed with one command request per `_COMMAND_CHUNK_SIZE` issues.
+        """
+        state = _RESOLUTION_MAP[resolution]
+        fields = "idReadable,customFields(name,value(name))"
+        issue_ids = list(self.iter_issue_ids(issue, issues_file)) if issue or issues_file else []
+        if not (issue_ids or query):
+            _fail("no issues given, use --issue, --issues-file or --query")
+        found = set()
+        closed: List[str] = []
+        skipped: List[str] = []
+        failed: Dict[str, str] = {}
+
+        def to_close() -> Iterator[str]:
+            issues = self.iter_issues_by_id(issue_ids, fields)
+            if query:
+                issues = itertools.chain(issues, self.iter_issues(query, fields))
+            for found_issue in issues:
+                issue_id = found_issue["idReadable"]
+                if issue_id.upper() in found:
+                    continue
+                found.add(issue_id.upper())
+                if _custom_field_value(found_issue, "State") == state:
+                    skipped.append(issue_id)
+                else:
+                    yield issue_id
+
+        # all matches are collected first, closing removes issues from the later pages of a query like `#Unresolved`
+        issues_to_close = list(to_close())
+        command = f"State {_command_value(state)}"
+        for chunk in _chunks(issues_to_close, _COMMAND_CHUNK_SIZE):
+            failures = self.apply_command(chunk, command)
+            failed.update(failures)
+            closed.extend(issue_id for issue_id in chunk if issue_id not in failures)
+        for issue_id in issue_ids:
+            if issue_id.upper() not in found:
+                failed[issue_id] = f"issue {issue_id} not found"
+        return {"closed": closed, "skipped": skipped, "failed": failed}
 
     def close_issue(self, issue: str, state: str = "Closed (Done)") -> None:
         """Close an issue by updating its State field."""
-        _assert_ok_status(
+        self._assert_ok_status(
             self._request(
                 f"api/issues/{issue}",
                 method="POST",
@@ -332,14 +1420,88 @@ class YouTrack:
             )
         )
 
+    def _urlopen(self, req: _Request) -> _PooledResponse:
+        """Send a request through the rate limiter, retrying throttled and failed requests.
+
+        Throttled (429) requests are always retried since the server did not process them,
+        server errors and connection failures only for idempotent methods. A connection failure
+        that is not retried (any more) raises `YouTrackError`.
+        """
+        idempotent = req.get_method() in _IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            throttled, retry_after = False, 0.0
+            waiting_since = time.monotonic()
+            self._limiter.acquire()
+            if self._tracer is not None:
+                self._tracer.add_wait("rate limiter", time.monotonic() - waiting_since)
+            try:
+                return self._pool.urlopen(req)
+            except _HTTPError as e:
+                # a throttling server slows down all requests, also the ones that are not retried
+                throttled = e.status in _THROTTLE_STATUS_CODES
+                retry_after = _retry_after(e.headers)
+                retryable = e.status == 429 or (idempotent and e.status in _RETRY_STATUS_CODES)
+                if not retryable or attempt >= self._max_retries:
+                    raise
+                e.read()
+            except OSError as e:
+                if not idempotent or attempt >= self._max_retries:
+                    raise YouTrackError(f"request `{req.full_url}` failed: {e}") from e
+            finally:
+                self._limiter.release(throttled, retry_after)
+            delay = max(retry_after, _backoff(attempt))
+            if self._tracer is not None:
+                self._tracer.add_wait("retries", delay)
+            time.sleep(delay)
+            attempt += 1
+
+    def _get_status_code(self, req: _Request) -> int:
+        try:
+            with self._urlopen(req) as response:
+                response.read()
+                return response.status
+        except _HTTPError as e:
+            e.read()
+            return e.status
+
+    def _get_json(self, req: _Request) -> Any:
+        try:
+            with self._urlopen(req) as response:
+                return json.loads(response.read())
+        except _HTTPError as e:
+            body = e.read().decode() if e.readable() else ""
+            _print_warning(f"request `{req.full_url}` failed with status code {e.status}: {body}")
+            return None
+
+    def _iter_json(self, req: _Request) -> Iterator[Any]:
+        """Stream the items of a JSON array response, a failed request yields nothing like `_get_json`."""
+        try:
+            with self._urlopen(req) as response:
+                yield from _iter_json_array(response)
+        except _HTTPError as e:
+            body = e.read().decode() if e.readable() else ""
+            _print_warning(f"request `{req.full_url}` failed with status code {e.status}: {body}")
+
+    def _assert_ok_status(self, req: _Request) -> None:
+        try:
+            with self._urlopen(req) as response:
+                response.read()
+                if 200 <= response.status < 300:
+                    return
+                _fail(f"request `{req.full_url}` failed with status code {response.status}")
+        except _HTTPError as e:
+            body = e.read().decode() if e.readable() else ""
+            _fail(f"request `{req.full_url}` failed with status code {e.status}: {body}")
+
     def _request(
             self,
             path: str,
             method: Optional[str] = None,
             headers: Optional[Dict[str, str]] = None,
-            data: Optional[bytes] = None
-    ) -> request.Request:
-        return request.Request(
+            data: Union[bytes, Iterable[bytes], None] = None
+    ) -> _Request:
+        return _Request(
             f"{self.base_url}/{path}",
             method=method,
             headers={
@@ -350,90 +1512,311 @@ class YouTrack:
         )
 
 
-if __name__ == "__main__":
+def _operation_argv(operation: Dict[str, Any]) -> List[str]:
+    """Translate a batch operation into the command line of its subcommand."""
+    argv = [str(operation["command"])]
+    for key, value in operation.items():
+        option = f"--{key.replace('_', '-')}"
+        if key == "command" or value is None or value is False:
+            continue
+        if value is True:
+            argv.append(option)
+        elif isinstance(value, list):
+            argv.extend([option, *map(str, value)])
+        else:
+            argv.append(f"{option}={value}")
+    return argv
+
+
+def _run_batch(youtrack: YouTrack, commands: Dict[str, ArgumentParser], operations_file: str) -> None:
+    """Run newline-delimited JSON operations one after another and print one JSON result line per operation.
+
+    Each operation names a subcommand and its options, e.g.
+    `{"command": "issue-tag", "issue": "SDK-1,SDK-2", "tags": "release"}`.
+    """
+    operations = sys.stdin if operations_file == "-" else open(operations_file, mode='r')
+    total = failed = 0
+    try:
+        for line_number, line in enumerate(operations, start=1):
+            if not line.strip():
+                continue
+            total += 1
+            outcome: Dict[str, Any] = {"line": line_number}
+            try:
+                operation = json.loads(line)
+                outcome["command"] = operation.get("command")
+                command_parser = commands.get(operation.get("command"))
+                if command_parser is None or outcome["command"] == "batch":
+                    _fail(f"unknown command {outcome['command']!r}")
+                try:
+                    args = command_parser.parse_args(_operation_argv(operation)[1:]).__dict__
+                except SystemExit:
+                    _fail(f"invalid arguments for {outcome['command']}")
+                func = args.pop("func")
+                result = func(youtrack, **args)
+                if _has_failures(result):
+                    failed += 1
+                outcome.update(ok=not _has_failures(result), result=result)
+            except Exception as e:
+                failed += 1
+                outcome.update(ok=False, error=str(e))
+            print(json.dumps(outcome), flush=True)
+    finally:
+        if operations is not sys.stdin:
+            operations.close()
+    if failed:
+        _fail(f"{failed} of {total} batch operations failed")
+
+
+def _clear_cache_arguments(parser: ArgumentParser) -> None:
+    parser.set_defaults(func=YouTrack.clear_cache)
+    parser.add_argument("--key")
+
+
+def _add_comment_arguments(parser: ArgumentParser) -> None:
+    parser.set_defaults(func=YouTrack.add_comment)
+    parser.add_argument("--issue", required=True)
+    parser.add_argument("--comment", required=True)
+
+
+def _add_attachment_arguments(parser: ArgumentParser) -> None:
+    parser.set_defaults(func=YouTrack.add_attachment)
+    parser.add_argument("--issue", required=True)
+    parser.add_argument("--path", required=True)
+
+
+def _add_attachments_arguments(parser: ArgumentParser) -> None:
+    parser.set_defaults(func=YouTrack.add_attachments)
+    parser.add_argument("--issue", required=True)
+    parser.add_argument("--path", dest="paths", nargs="+", required=True)
+
+
+def _add_comments_arguments(parser: ArgumentParser) -> None:
+    parser.set_defaults(func=YouTrack.add_comments)
+    parser.add_argument("--comments-file", required=True)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of issues to handle in parallel")
+
+
+def _get_issue_arguments(parser: ArgumentParser) -> None:
+    parser.set_defaults(func=YouTrack.get_issue)
+    parser.add_argument("--issue", required=True)
+    parser.add_argument("--fields", default="id,idReadable")
+
+
+def _get_version_arguments(parser: ArgumentParser) -> None:
+    parser.set_defaults(func=YouTrack.get_version)
+    parser.add_argument("--project", required=True)
+    parser.add_argument("--version", required=True)
+    parser.add_argument("--fields", default="id,name", help="fields projection, has to include name")
+
+
+def _release_version_arguments(parser: ArgumentParser) -> None:
+    parser.set_defaults(func=YouTrack.release_version)
+    parser.add_argument("--project", required=True)
+    parser.add_argument("--version", required=True)
+
+
+def _issue_create_arguments(parser: ArgumentParser) -> None:
+    parser.set_defaults(func=YouTrack.issue_create)
+    parser.add_argument("--project", required=True)
+    parser.add_argument("--summary", required=True)
+    parser.add_argument("--description", default="")
+    parser.add_argument("--type", dest="issue_type", default="")
+    parser.add_argument("--tags", default="")
+    parser.add_argument("--assignee", default="")
+    parser.add_argument("--deduplicate", action="store_true")
+
+
+def _issues_create_arguments(parser: ArgumentParser) -> None:
+    parser.set_defaults(func=YouTrack.issues_create)
+    parser.add_argument("--issues-file", default="-",
+                        help="JSONL file with one issue-create spec per line (default: stdin)")
+    parser.add_argument("--deduplicate", action="store_true")
+    parser.add_argument("--workers", type=int, default=8,
+                        help="number of issues to create in parallel")
+
+
+def _issue_watch_arguments(parser: ArgumentParser) -> None:
+    parser.set_defaults(func=YouTrack.issue_watch)
+    parser.add_argument("--issue", default="")
+    parser.add_argument("--issues-file", help="file with issue IDs, - for stdin")
+    parser.add_argument("--query", help="watch all issues matching this search query")
+    parser.add_argument("--logins", required=True)
+    parser.add_argument("--workers", type=int, default=8,
+                        help="number of watchers to add in parallel")
+
+
+def _issue_link_arguments(parser: ArgumentParser) -> None:
+    parser.set_defaults(func=YouTrack.issue_link)
+    parser.add_argument("--issue", default="")
+    parser.add_argument("--issues-file", help="file with issue IDs, - for stdin")
+    parser.add_argument("--query", help="link all issues matching this search query")
+    parser.add_argument("--type", dest="link_type", required=True,
+                        choices=_LINK_TYPE_MAP.keys())
+    parser.add_argument("--links", required=True)
+    parser.add_argument("--workers", type=int, default=8,
+                        help="number of links to add in parallel")
+
+
+def _issue_search_arguments(parser: ArgumentParser) -> None:
+    parser.set_defaults(func=YouTrack.issue_search)
+    parser.add_argument("--query", required=True)
+    parser.add_argument("--format", dest="output_format", default="json",
+                        choices=["json", "ndjson", "csv"],
+                        help="ndjson and csv stream the issues while they are fetched")
+    parser.add_argument("--fields", default="idReadable",
+                        help="fields projection for the ndjson and csv formats")
+
+
+def _issue_tag_arguments(parser: ArgumentParser) -> None:
+    parser.set_defaults(func=YouTrack.issue_tag)
+    parser.add_argument("--issue", default="")
+    parser.add_argument("--issues-file", help="file with issue IDs, - for stdin")
+    parser.add_argument("--query", help="tag all issues matching this search query")
+    parser.add_argument("--tags", required=True)
+
+
+def _issue_close_arguments(parser: ArgumentParser) -> None:
+    parser.set_defaults(func=YouTrack.issue_close)
+    parser.add_argument("--issue", default="")
+    parser.add_argument("--issues-file", help="file with issue IDs, - for stdin")
+    parser.add_argument("--query", help="close all issues matching this search query")
+    parser.add_argument("--resolution", required=True,
+                        choices=_RESOLUTION_MAP.keys())
+
+
+def _close_issue_arguments(parser: ArgumentParser) -> None:
+    parser.set_defaults(func=YouTrack.close_issue)
+    parser.add_argument("--issue", required=True)
+    parser.add_argument("--state", default="Closed (Done)")
+
+
+def _project_keys_arguments(parser: ArgumentParser) -> None:
+    parser.set_defaults(func=YouTrack.get_project_keys)
+
+
+def _batch_arguments(parser: ArgumentParser) -> None:
+    parser.add_argument("--operations-file", default="-",
+                        help="JSONL file with one operation per line (default: stdin)")
+
+
+# subcommand name -> function adding its arguments, only the chosen subcommand is set up
+_COMMANDS: Dict[str, Callable[[ArgumentParser], None]] = {
+    "clear-cache": _clear_cache_arguments,
+    "add-comment": _add_comment_arguments,
+    "add-attachment": _add_attachment_arguments,
+    "add-attachments": _add_attachments_arguments,
+    "add-comments": _add_comments_arguments,
+    "get-issue": _get_issue_arguments,
+    "get-version": _get_version_arguments,
+    "release-version": _release_version_arguments,
+    "issue-create": _issue_create_arguments,
+    "issues-create": _issues_create_arguments,
+    "issue-watch": _issue_watch_arguments,
+    "issue-link": _issue_link_arguments,
+    "issue-search": _issue_search_arguments,
+    "issue-tag": _issue_tag_arguments,
+    "issue-close": _issue_close_arguments,
+    "close-issue": _close_issue_arguments,
+    "project-keys": _project_keys_arguments,
+    "batch": _batch_arguments,
+}
+
+
+def _add_global_arguments(parser: ArgumentParser, required: bool = True) -> None:
+    parser.add_argument("--base-url", required=required)
+    parser.add_argument("--token", required=required)
+    parser.add_argument("--cache-ttl", type=float, default=3600,
+                        help="seconds to cache bundle, tag, link type and user lookups")
+    parser.add_argument("--cache-file",
+                        help="JSON file to share the lookup cache between runs "
+                             "(default: a file below $RUNNER_TEMP if set)")
+    parser.add_argument("--rate", type=float, default=50,
+                        help="maximum requests per second, lowered automatically when throttled")
+    parser.add_argument("--max-concurrency", type=int, default=16,
+                        help="maximum concurrent requests, lowered automatically when throttled")
+    parser.add_argument("--max-retries", type=int, default=5)
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="run the command on the asyncio client")
+    parser.add_argument("--trace-file", default=os.environ.get("YOUTRACK_TRACE_FILE"),
+                        help="append a JSON line with all requests of this run to this file")
+    parser.add_argument("--trace-summary", action="store_true",
+                        default=bool(os.environ.get("YOUTRACK_TRACE_SUMMARY")),
+                        help="append a request summary to $GITHUB_STEP_SUMMARY")
+
+
+def _chosen_command() -> Optional[str]:
+    """The subcommand of the command line, the first positional argument after the global options."""
+    parser = ArgumentParser(add_help=False)
+    _add_global_arguments(parser, required=False)
+    parser.add_argument("command", nargs="?")
+    return parser.parse_known_args()[0].command
+
+
+def main() -> None:
     parser = ArgumentParser("YouTrack")
-    parser.add_argument("--base-url", required=True)
-    parser.add_argument("--token", required=True)
-    subparsers = parser.add_subparsers(required=True)
-
-    add_comment_parser = subparsers.add_parser("add-comment")
-    add_comment_parser.set_defaults(func=YouTrack.add_comment)
-    add_comment_parser.add_argument("--issue", required=True)
-    add_comment_parser.add_argument("--comment", required=True)
-
-    add_attachments = subparsers.add_parser("add-attachment")
-    add_attachments.set_defaults(func=YouTrack.add_attachment)
-    add_attachments.add_argument("--issue", required=True)
-    add_attachments.add_argument("--path", required=True)
-
-    add_comments_parser = subparsers.add_parser("add-comments")
-    add_comments_parser.set_defaults(func=YouTrack.add_comments)
-    add_comments_parser.add_argument("--comments-file", required=True)
-
-    get_issue_parser = subparsers.add_parser("get-issue")
-    get_issue_parser.set_defaults(func=YouTrack.get_issue)
-    get_issue_parser.add_argument("--issue", required=True)
-
-    get_version_parser = subparsers.add_parser("get-version")
-    get_version_parser.set_defaults(func=YouTrack.get_version)
-    get_version_parser.add_argument("--project", required=True)
-    get_version_parser.add_argument("--version", required=True)
-
-    release_version_parser = subparsers.add_parser("release-version")
-    release_version_parser.set_defaults(func=YouTrack.release_version)
-    release_version_parser.add_argument("--project", required=True)
-    release_version_parser.add_argument("--version", required=True)
-
-    issue_create_parser = subparsers.add_parser("issue-create")
-    issue_create_parser.set_defaults(func=YouTrack.issue_create)
-    issue_create_parser.add_argument("--project", required=True)
-    issue_create_parser.add_argument("--summary", required=True)
-    issue_create_parser.add_argument("--description", default="")
-    issue_create_parser.add_argument("--type", dest="issue_type", default="")
-    issue_create_parser.add_argument("--tags", default="")
-    issue_create_parser.add_argument("--assignee", default="")
-    issue_create_parser.add_argument("--deduplicate", action="store_true")
-
-    issue_watch_parser = subparsers.add_parser("issue-watch")
-    issue_watch_parser.set_defaults(func=YouTrack.issue_watch)
-    issue_watch_parser.add_argument("--issue", required=True)
-    issue_watch_parser.add_argument("--logins", required=True)
-
-    issue_link_parser = subparsers.add_parser("issue-link")
-    issue_link_parser.set_defaults(func=YouTrack.issue_link)
-    issue_link_parser.add_argument("--issue", required=True)
-    issue_link_parser.add_argument("--type", dest="link_type", required=True,
-                                   choices=_LINK_TYPE_MAP.keys())
-    issue_link_parser.add_argument("--links", required=True)
-
-    issue_search_parser = subparsers.add_parser("issue-search")
-    issue_search_parser.set_defaults(func=YouTrack.issue_search)
-    issue_search_parser.add_argument("--query", required=True)
-
-    issue_tag_parser = subparsers.add_parser("issue-tag")
-    issue_tag_parser.set_defaults(func=YouTrack.issue_tag)
-    issue_tag_parser.add_argument("--issue", required=True)
-    issue_tag_parser.add_argument("--tags", required=True)
-
-    issue_close_parser = subparsers.add_parser("issue-close")
-    issue_close_parser.set_defaults(func=lambda yt, issue, resolution:
-                                    yt.close_issue(issue, _RESOLUTION_MAP[resolution]))
-    issue_close_parser.add_argument("--issue", required=True)
-    issue_close_parser.add_argument("--resolution", required=True,
-                                    choices=_RESOLUTION_MAP.keys())
-
-    close_issue_parser = subparsers.add_parser("close-issue")
-    close_issue_parser.set_defaults(func=YouTrack.close_issue)
-    close_issue_parser.add_argument("--issue", required=True)
-    close_issue_parser.add_argument("--state", default="Closed (Done)")
+    _add_global_arguments(parser)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    # building all subcommand parsers is a noticeable part of the startup, so only the chosen one
+    # gets its arguments (batch needs all of them)
+    chosen = _chosen_command()
+    for name, add_arguments in _COMMANDS.items():
+        command_parser = subparsers.add_parser(name)
+        if chosen == "batch" or name == chosen:
+            add_arguments(command_parser)
+    subparsers.choices["batch"].set_defaults(func=lambda yt, operations_file:
+                                             _run_batch(yt, subparsers.choices, operations_file))
 
     args = parser.parse_args().__dict__
 
-    youtrack = YouTrack(
-        base_url=args.pop("base_url"),
+    base_url = args.pop("base_url")
+    cache_file = args.pop("cache_file")
+    trace_file = args.pop("trace_file")
+    trace_summary = os.environ.get("GITHUB_STEP_SUMMARY") if args.pop("trace_summary") else None
+    command = args.pop("command")
+    tracer = _Tracer(command) if trace_file or trace_summary else None
+    client_options = dict(
+        base_url=base_url,
         token=args.pop("token"),
+        cache_ttl=args.pop("cache_ttl"),
+        cache_file=cache_file if cache_file is not None else _default_cache_file(base_url),
+        rate=args.pop("rate"),
+        max_concurrency=args.pop("max_concurrency"),
+        max_retries=args.pop("max_retries"),
+        tracer=tracer,
     )
     func = args.pop("func")
-    result = func(youtrack, **args)
+    use_async = args.pop("use_async")
+    try:
+        if use_async:
+            # let youtrack_async share this module (and its YouTrackError) instead of importing it a second time
+            sys.modules.setdefault("youtrack", sys.modules[__name__])
+            from youtrack_async import AsyncYouTrack, run_async
+            if not hasattr(AsyncYouTrack, func.__name__):
+                parser.error("this command does not support --async")
+            result = run_async(func.__name__, client_options, args)
+        else:
+            youtrack = YouTrack(**client_options)
+            try:
+                result = func(youtrack, **args)
+            finally:
+                youtrack.close()
+    except YouTrackError as e:
+        _print_error(str(e))
+        sys.exit(1)
+    finally:
+        if tracer is not None and trace_file:
+            tracer.write_trace(trace_file)
+        if tracer is not None and trace_summary:
+            tracer.write_summary(trace_summary)
     if result is not None:
         print(json.dumps(result, indent=2))
+    if _has_failures(result):
+        _print_error(f"failed for {len(result['failed'])} issues: "
+                     + "; ".join(f"{issue}: {error}" for issue, error in sorted(result["failed"].items())))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
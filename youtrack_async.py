@@ -0,0 +1,849 @@
+#!python3
+# -*- coding: utf-8 -*-
+"""asyncio counterpart of the `YouTrack` client for large fan-outs, using only the standard library."""
+import asyncio
+import datetime
+import json
+import ssl
+import sys
+import time
+from email.message import Message
+from http.client import RemoteDisconnected
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+from urllib.parse import quote, urlsplit
+
+from youtrack import (
+    YouTrackError,
+    _ACCEPT_ENCODING,
+    _COMMAND_CHUNK_SIZE,
+    _IDEMPOTENT_METHODS,
+    _LINK_TYPE_MAP,
+    _RESOLUTION_MAP,
+    _RETRY_STATUS_CODES,
+    _THROTTLE_STATUS_CODES,
+    _MetadataCache,
+    _MultipartFiles,
+    _RateLimits,
+    _Tracer,
+    _backoff,
+    _command_value,
+    _comments_result,
+    _custom_field_value,
+    _decompressor,
+    _fail,
+    _failures_by_issue,
+    _first_lines,
+    _issue_body,
+    _issue_writer,
+    _issues_create_result,
+    _lines_by_tags,
+    _next_page_size,
+    _plan_issue_specs,
+    _print_warning,
+    _read_ids,
+    _read_issue_specs,
+    _retry_after,
+    _spec_lookups,
+    _split_ids,
+    _split_tags,
+)
+
+
+class _AsyncResponse(NamedTuple):
+    status: int
+    reason: str
+    headers: Message
+    body: bytes
+
+
+class _AsyncConnectionPool:
+    """Pool of keep-alive HTTP/1.1 connections to the host of a base URL on top of asyncio streams.
+
+    Like the sync client, the timeout applies to every single connect, write and read, so a large
+    upload is not limited as a whole. Unlike the sync client, response bodies are read completely
+    before they are decoded, the incremental decoding of large JSON arrays does not apply here.
+    """
+
+    _read_size = 64 * 1024
+
+    def __init__(self, base_url: str, maxsize: int = 10, timeout: float = 60,
+                 tracer: Optional[_Tracer] = None) -> None:
+        url = urlsplit(base_url)
+        self._ssl = ssl.create_default_context() if url.scheme == "https" else None
+        self._host = url.hostname
+        self._port = url.port or (443 if self._ssl else 80)
+        self._netloc = url.netloc
+        self._maxsize = maxsize
+        self._timeout = timeout
+        self._tracer = tracer
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+
+    async def request(self, method: str, target: str, headers: Dict[str, str],
+                      body: Union[bytes, Iterable[bytes], None] = None) -> _AsyncResponse:
+        while True:
+            reused = bool(self._idle)
+            started = time.monotonic()
+            connect_time = None
+            if reused:
+                reader, writer = self._idle.pop()
+            else:
+                reader, writer = await self._wait(
+                    asyncio.open_connection(self._host, self._port, ssl=self._ssl))
+                connect_time = time.monotonic() - started
+            try:
+                await self._send(writer, method, target, headers, body)
+                response, reusable = await self._receive(reader, method)
+            except (RemoteDisconnected, ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError) as error:
+                writer.close()
+                if reused:
+                    # the server dropped the idle keep-alive connection, retry on a fresh one
+                    continue
+                if isinstance(error, asyncio.IncompleteReadError):
+                    # an EOFError, raise it as OSError so that it is retried and reported like other connection errors
+                    raise ConnectionError(f"connection closed after {len(error.partial)} bytes "
+                                          f"of {error.expected} expected") from error
+                raise
+            except BaseException:
+                writer.close()
+                raise
+            break
+        if reusable and len(self._idle) < self._maxsize:
+            self._idle.append((reader, writer))
+        else:
+            writer.close()
+        if self._tracer is not None:
+            self._tracer.record(method, target, response.status, len(body) if body is not None else 0,
+                                len(response.body), connect_time, time.monotonic() - started)
+        decompressor = _decompressor(response.headers.get("Content-Encoding"))
+        if decompressor is not None:
+            response = response._replace(body=decompressor.decompress(response.body) + decompressor.flush())
+        return response
+
+    def _wait(self, operation: Awaitable[Any]) -> Awaitable[Any]:
+        """Limit a single connect, write or read to the timeout."""
+        return asyncio.wait_for(operation, self._timeout)
+
+    async def _send(self, writer: asyncio.StreamWriter, method: str, target: str, headers: Dict[str, str],
+                    body: Union[bytes, Iterable[bytes], None]) -> None:
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {self._netloc}", "Connection: keep-alive",
+                 f"Accept-Encoding: {_ACCEPT_ENCODING}"]
+        if body is not None and not any(name.lower() == "content-length" for name in headers):
+            headers = {**headers, "Content-Length": str(len(body))}
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if isinstance(body, bytes):
+            writer.write(body)
+        elif body is not None:
+            # the chunks are read from disk in the default executor, not on the event loop
+            loop = asyncio.get_running_loop()
+            chunks = iter(body)
+            while True:
+                chunk = await loop.run_in_executor(None, next, chunks, None)
+                if chunk is None:
+                    break
+                writer.write(chunk)
+                await self._wait(writer.drain())
+        await self._wait(writer.drain())
+
+    async def _receive(self, reader: asyncio.StreamReader, method: str) -> Tuple[_AsyncResponse, bool]:
+        """Read a response, returns it and whether the connection can be reused afterwards."""
+        while True:
+            status_line = await self._wait(reader.readline())
+            if not status_line:
+                raise RemoteDisconnected("remote end closed connection without response")
+            version, status, *reason = status_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+            headers = Message()
+            while True:
+                line = await self._wait(reader.readline())
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip()] = value.strip()
+            if not 100 <= int(status) < 200:
+                break
+
+        reusable = version == "HTTP/1.1" and headers.get("Connection", "").lower() != "close"
+        if method == "HEAD" or int(status) in (204, 304):
+            body = b""
+        elif "chunked" in headers.get("Transfer-Encoding", "").lower():
+            body = await self._read_chunked(reader)
+        elif "Content-Length" in headers:
+            body = await self._read_exactly(reader, int(headers["Content-Length"]))
+        else:
+            chunks = []
+            while True:
+                chunk = await self._wait(reader.read(self._read_size))
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            body = b"".join(chunks)
+            reusable = False
+        return _AsyncResponse(int(status), reason[0] if reason else "", headers, body), reusable
+
+    async def _read_exactly(self, reader: asyncio.StreamReader, size: int) -> bytes:
+        chunks = []
+        while size > 0:
+            chunk = await self._wait(reader.readexactly(min(size, self._read_size)))
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+    async def _read_chunked(self, reader: asyncio.StreamReader) -> bytes:
+        chunks = []
+        while True:
+            size = int((await self._wait(reader.readline())).split(b";")[0].strip(), 16)
+            if size == 0:
+                break
+            chunks.append(await self._read_exactly(reader, size))
+            await self._wait(reader.readexactly(2))
+        # skip trailers
+        while (await self._wait(reader.readline())) not in (b"\r\n", b"\n", b""):
+            pass
+        return b"".join(chunks)
+
+    def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+
+
+class _AsyncRateLimiter(_RateLimits):
+    def __init__(self, rate: float, max_concurrency: int) -> None:
+        super().__init__(rate, max_concurrency)
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            acquired, timeout = self._try_acquire()
+            while not acquired:
+                try:
+                    await asyncio.wait_for(self._condition.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                acquired, timeout = self._try_acquire()
+
+    async def release(self, throttled: bool = False, retry_after: float = 0.0) -> None:
+        async with self._condition:
+            self._release(throttled, retry_after)
+            self._condition.notify_all()
+
+
+class AsyncYouTrack:
+    """asyncio version of `YouTrack` with the same methods as coroutines.
+
+    Methods that touch many issues, tags, logins or links run their requests concurrently,
+    bounded by the client-wide rate limiter.
+    """
+
+    def __init__(self, base_url: str, token: str,
+                 cache_ttl: float = 3600, cache_file: Optional[str] = None,
+                 rate: float = 50, max_concurrency: int = 16, max_retries: int = 5,
+                 tracer: Optional[_Tracer] = None) -> None:
+        self.base_url = base_url.rstrip('/')
+        self.token = token
+        self._base_path = urlsplit(self.base_url).path
+        self._tracer = tracer
+        self._pool = _AsyncConnectionPool(self.base_url, maxsize=max_concurrency, tracer=tracer)
+        self._limiter = _AsyncRateLimiter(rate, max_concurrency)
+        self._max_retries = max_retries
+        self._cache = _MetadataCache(cache_ttl, cache_file)
+
+    async def close(self) -> None:
+        """Close all idle keep-alive connections."""
+        self._pool.close()
+
+    async def clear_cache(self, key: Optional[str] = None) -> None:
+        """Invalidate a cached lookup (e.g. `tag-ids`) or the whole metadata cache."""
+        self._cache.invalidate(key)
+
+    async def add_attachment(self, issue: str, path: str) -> None:
+        await self.add_attachments(issue, [path])
+
+    async def add_attachments(self, issue: str, paths: List[str]) -> None:
+        """Upload files to an issue in a single request, streaming them from disk."""
+        body = _MultipartFiles(paths)
+        await self._assert_ok_status(
+            f"api/issues/{issue}/attachments",
+            method="POST",
+            headers={"Content-Type": body.content_type, "Content-Length": str(len(body))},
+            data=body,
+        )
+
+    async def add_comments(self, comments_file: str, workers: int = 1) -> Dict[str, Any]:
+        """Post the comments of a comments file, handling up to `workers` issues concurrently.
+
+        The attachments of an issue are always uploaded before its comment is posted.
+        Failing issues do not stop the others. Returns the commented issues, the skipped
+        issues that do not exist and the error of every failed issue.
+        """
+        with open(comments_file, mode='r') as cf:
+            comments = json.load(cf)
+        semaphore = asyncio.Semaphore(max(workers, 1))
+        skipped: List[str] = []
+
+        async def add_issue_comment(issue: str, comment: Any) -> None:
+            async with semaphore:
+                if isinstance(comment, dict):
+                    attachments = comment.get('attachments', [])
+                    comment = comment.get('comment', '')
+                else:
+                    attachments = []
+                if attachments:
+                    await self.add_attachments(issue, attachments)
+                if not await self._post_comment(issue, comment):
+                    skipped.append(issue)
+
+        results = await asyncio.gather(
+            *(add_issue_comment(issue, comment) for issue, comment in comments.items()),
+            return_exceptions=True,
+        )
+        failed = {issue: str(result) for issue, result in zip(comments, results) if isinstance(result, Exception)}
+        return _comments_result(comments, skipped, failed)
+
+    async def add_comment(self, issue: str, comment: str) -> None:
+        await self._post_comment(issue, comment)
+
+    async def _post_comment(self, issue: str, comment: str) -> bool:
+        """Post a comment, returns False if the issue does not exist."""
+        path = f"api/issues/{issue}/comments"
+        status_code = await self._get_status_code(
+            path,
+            headers={"Content-Type": "application/json"},
+            data=json.dumps({"text": comment}).encode(),
+        )
+        if status_code == 404:
+            print(f"::warning::issue {issue} not found, skipping comment", file=sys.stderr)
+            return False
+        if 200 <= status_code < 300:
+            return True
+        _fail(f"request `{self.base_url}/{path}` failed with status code {status_code}")
+
+    async def get_issue(self, issue: str, fields: str = "id,idReadable") -> Any:
+        return await self._get_json(f"api/issues/{issue}?fields={fields}")
+
+    async def get_fix_version_bundle_id(self, project: str) -> Optional[str]:
+        """Auto-discover the bundle ID for the 'Fix versions' field from project settings."""
+        return await self._cached(f"fix-version-bundle:{project}",
+                                  lambda: self._fetch_fix_version_bundle_id(project))
+
+    async def _fetch_fix_version_bundle_id(self, project: str) -> Optional[str]:
+        issues = await self._get_json(
+            f"api/issues?query=project:{project}&fields=customFields(name,projectCustomField(bundle(id)))&$top=1"
+        )
+        if issues:
+            for field in issues[0].get("customFields", []):
+                if field.get("name") == "Fix versions":
+                    bundle = field.get("projectCustomField", {}).get("bundle")
+                    if bundle:
+                        return bundle.get("id")
+        return None
+
+    async def get_version(self, project: str, version: str, fields: str = "id,name") -> Any:
+        """Get version info by looking up the bundle from project's Fix versions field."""
+        bundle_id = await self.get_fix_version_bundle_id(project)
+        if not bundle_id:
+            return None
+        return await self.find_version(bundle_id, version, fields=fields)
+
+    async def find_version(self, bundle_id: str, version: str, page_size: int = 100,
+                           fields: str = "id,name") -> Optional[Dict]:
+        """Find a version by name in a version bundle, see `YouTrack.find_version`."""
+        skip = 0
+        while True:
+            values = await self._get_json(
+                f"api/admin/customFieldSettings/bundles/version/{bundle_id}/values"
+                f"?fields={fields}&query={quote(version)}&$top={page_size}&$skip={skip}"
+            )
+            if not values:
+                return None
+            for version_data in values:
+                if version_data.get("name") == version:
+                    return version_data
+            if len(values) < page_size:
+                return None
+            skip += page_size
+
+    async def release_version(self, project: str, version: str) -> None:
+        bundle_id = await self.get_fix_version_bundle_id(project)
+        if not bundle_id:
+            _fail(f"could not find Fix versions bundle for project {project}")
+
+        version_data = await self.find_version(bundle_id, version)
+        if version_data is None:
+            _fail(f"version {version} in project {project} does not exist")
+
+        release_date_ms = int(datetime.datetime.now().timestamp() * 1000)
+        await self._assert_ok_status(
+            f"api/admin/customFieldSettings/bundles/version/{bundle_id}/values/{version_data['id']}",
+            method="POST",
+            headers={"Content-Type": "application/json"},
+            data=json.dumps({
+                "released": True,
+                "releaseDate": release_date_ms
+            }).encode()
+        )
+
+    async def get_user(self, login: str) -> Optional[Dict]:
+        """Get a YouTrack user by login."""
+        return await self._cached(f"user:{login}", lambda: self._get_json(
+            f"api/users/{quote(login)}?fields=id,login"
+        ))
+
+    async def get_user_ids(self) -> Dict[str, str]:
+        """Get all users as {login: id} map."""
+        return await self._cached("user-ids", self._fetch_user_ids)
+
+    async def _fetch_user_ids(self) -> Dict[str, str]:
+        users = await self._get_json("api/users?fields=id,login&$top=-1")
+        if not users:
+            _fail("failed to retrieve users")
+        return {u["login"]: u["id"] for u in users}
+
+    async def get_user_id(self, login: str) -> str:
+        """Get the ID of a user by login, refreshing the cached users once if the login is unknown."""
+        user_id = (await self.get_user_ids()).get(login)
+        if user_id is None:
+            self._cache.invalidate("user-ids")
+            user_id = (await self.get_user_ids()).get(login)
+        if user_id is None:
+            _fail(f"user with login {login} not found")
+        return user_id
+
+    async def search_issues(self, project: str, summary: str) -> Optional[Dict]:
+        """Search for an issue by exact summary in a project."""
+        query = quote(f'project: {{{project}}} summary: {summary}')
+        issues = await self._get_json(f"api/issues?query={query}&fields=idReadable,summary&$top=10")
+        if issues:
+            for issue in issues:
+                if issue.get("summary") == summary:
+                    return {"idReadable": issue["idReadable"]}
+        return None
+
+    async def issue_create(self, project: str, summary: str, description: str = "",
+                           issue_type: str = "", tags: str = "",
+                           assignee: str = "", deduplicate: bool = False) -> Dict:
+        """Create a YouTrack issue with optional deduplication."""
+        if deduplicate:
+            existing = await self.search_issues(project, summary)
+            if existing:
+                return existing
+
+        assignee_id = ""
+        if assignee:
+            user = await self.get_user(assignee)
+            if not user:
+                _fail(f"user with login {assignee} not found")
+            assignee_id = user["id"]
+
+        body = _issue_body(project, summary, description, issue_type, assignee_id)
+        result = await self._get_json(
+            "api/issues?fields=idReadable",
+            method="POST",
+            headers={"Content-Type": "application/json"},
+            data=json.dumps(body).encode()
+        )
+        if not result:
+            _fail("failed to create issue")
+        if tags:
+            tagged = await self.issue_tag(result["idReadable"], tags)
+            if tagged["failed"]:
+                _fail(f"failed to tag issue {result['idReadable']}: {tagged['failed'][result['idReadable']]}")
+        return result
+
+    async def get_summary_index(self, project: str) -> Dict[str, str]:
+        """Map the summaries of all issues of a project to their IDs, fetched with one streamed search."""
+        return {issue["summary"]: issue["idReadable"]
+                async for issue in self.iter_issues(f"project: {{{project}}}", "idReadable,summary")}
+
+    async def issues_create(self, issues_file: str = "-", deduplicate: bool = False,
+                            workers: int = 8) -> Dict[str, Any]:
+        """Create the issues of a JSONL file concurrently, see `YouTrack.issues_create`."""
+        specs = _read_issue_specs(issues_file)
+        issue_ids: Dict[int, str] = {}
+        created: Dict[int, bool] = {}
+
+        # an unknown assignee or tag only fails the lines using it
+        lookup_errors: Dict[Tuple[str, str], str] = {}
+        for kind, name in _spec_lookups(specs):
+            try:
+                await (self.get_user_id(name) if kind == "assignee" else self.get_tag_id(name))
+            except YouTrackError as e:
+                lookup_errors[(kind, name)] = str(e)
+        keys, failed = _plan_issue_specs(specs, lookup_errors)
+        first_lines = _first_lines(keys)
+
+        if deduplicate:
+            projects = list({project for project, _ in first_lines})
+            indexes = dict(zip(projects, await asyncio.gather(*map(self.get_summary_index, projects))))
+            for (project, summary), line in first_lines.items():
+                if summary in indexes[project]:
+                    issue_ids[line] = indexes[project][summary]
+        pending = [line for line in first_lines.values() if line not in issue_ids]
+        semaphore = asyncio.Semaphore(max(workers, 1))
+
+        async def create(line: int) -> None:
+            spec = specs[line - 1]
+            assignee_id = await self.get_user_id(spec["assignee"]) if spec.get("assignee") else ""
+            async with semaphore:
+                result = await self._get_json(
+                    "api/issues?fields=idReadable",
+                    method="POST",
+                    headers={"Content-Type": "application/json"},
+                    data=json.dumps(_issue_body(spec["project"], spec["summary"], spec.get("description", ""),
+                                                spec.get("type", ""), assignee_id)).encode()
+                )
+            if not result:
+                _fail("failed to create issue")
+            issue_ids[line] = result["idReadable"]
+            created[line] = True
+
+        results = await asyncio.gather(*map(create, pending), return_exceptions=True)
+        for line, result in zip(pending, results):
+            if isinstance(result, Exception):
+                failed[str(line)] = str(result)
+
+        for tags, lines in _lines_by_tags(specs, created).items():
+            tag_failures = (await self.issue_tag(",".join(issue_ids[line] for line in lines), tags))["failed"]
+            for line in lines:
+                if issue_ids[line] in tag_failures:
+                    failed[str(line)] = f"created {issue_ids[line]} but failed to tag it: " \
+                                        f"{tag_failures[issue_ids[line]]}"
+        return _issues_create_result(keys, first_lines, issue_ids, created, failed)
+
+    async def get_tag_ids(self) -> Dict[str, str]:
+        """Get all issue tags as {name: id} map."""
+        return await self._cached("tag-ids", self._fetch_tag_ids)
+
+    async def _fetch_tag_ids(self) -> Dict[str, str]:
+        tags = await self._get_json("api/issueTags?fields=id,name&$top=-1")
+        if not tags:
+            _fail("failed to retrieve issue tags")
+        return {t["name"]: t["id"] for t in tags}
+
+    async def get_tag_id(self, tag: str) -> str:
+        """Get the ID of a tag, refreshing the cached tags once if the name is unknown."""
+        tag_id = (await self.get_tag_ids()).get(tag)
+        if tag_id is None:
+            self._cache.invalidate("tag-ids")
+            tag_id = (await self.get_tag_ids()).get(tag)
+        if tag_id is None:
+            _fail(f"tag {tag} not found")
+        return tag_id
+
+    async def iter_issue_ids(self, issue: str = "", issues_file: Optional[str] = None,
+                             query: Optional[str] = None) -> AsyncIterator[str]:
+        """Yield the distinct issue IDs given directly, in a file and/or matched by a search query."""
+        if not (issue or issues_file or query):
+            _fail("no issues given, use --issue, --issues-file or --query")
+        issue_ids = _split_ids(issue) + (_read_ids(issues_file) if issues_file else [])
+        seen = set()
+
+        async def source() -> AsyncIterator[str]:
+            for issue_id in issue_ids:
+                yield issue_id
+            if query:
+                async for found in self.iter_issues(query):
+                    yield found["idReadable"]
+
+        async for issue_id in source():
+            if issue_id.upper() not in seen:
+                seen.add(issue_id.upper())
+                yield issue_id
+
+    async def apply_command(self, issue_ids: List[str], command: str) -> Dict[str, str]:
+        """Apply a YouTrack command to issues, bisecting them on failure like `YouTrack.apply_command`."""
+        try:
+            await self._assert_ok_status(
+                "api/commands",
+                method="POST",
+                headers={"Content-Type": "application/json"},
+                data=json.dumps({
+                    "query": command,
+                    "issues": [{"idReadable": issue_id} for issue_id in issue_ids],
+                }).encode()
+            )
+            return {}
+        except YouTrackError as e:
+            if len(issue_ids) == 1:
+                return {issue_ids[0]: str(e)}
+        middle = len(issue_ids) // 2
+        halves = await asyncio.gather(self.apply_command(issue_ids[:middle], command),
+                                      self.apply_command(issue_ids[middle:], command))
+        return {**halves[0], **halves[1]}
+
+    async def issue_tag(self, issue: str = "", tags: str = "", issues_file: Optional[str] = None,
+                        query: Optional[str] = None) -> Dict[str, Any]:
+        """Add tags to issues with concurrent command requests, see `YouTrack.issue_tag`."""
+        tag_names = _split_tags(tags)
+        if not tag_names:
+            _fail("no tags given")
+        for tag in tag_names:
+            await self.get_tag_id(tag)
+        command = " ".join(f"tag {_command_value(tag)}" for tag in tag_names)
+
+        issue_ids = [issue_id async for issue_id in self.iter_issue_ids(issue, issues_file, query)]
+        chunks = [issue_ids[start:start + _COMMAND_CHUNK_SIZE]
+                  for start in range(0, len(issue_ids), _COMMAND_CHUNK_SIZE)]
+        failed: Dict[str, str] = {}
+        for failures in await asyncio.gather(*(self.apply_command(chunk, command) for chunk in chunks)):
+            failed.update(failures)
+        return {"tagged": [issue_id for issue_id in issue_ids if issue_id not in failed], "failed": failed}
+
+    async def issue_watch(self, issue: str = "", logins: str = "", issues_file: Optional[str] = None,
+                          query: Optional[str] = None, workers: int = 8) -> Dict[str, Any]:
+        """Add watchers to issues with concurrent requests, see `YouTrack.issue_watch`."""
+        user_ids = [await self.get_user_id(login) for login in _split_ids(logins)]
+        if not user_ids:
+            _fail("no logins given")
+        issue_ids = [issue_id async for issue_id in self.iter_issue_ids(issue, issues_file, query)]
+        semaphore = asyncio.Semaphore(max(workers, 1))
+
+        async def add_watcher(issue_id: str, user_id: str) -> None:
+            async with semaphore:
+                await self._assert_ok_status(
+                    f"api/issues/{issue_id}/watchers/issueWatchers",
+                    method="POST",
+                    headers={"Content-Type": "application/json"},
+                    data=json.dumps({"user": {"id": user_id}, "isStarred": True}).encode()
+                )
+
+        pairs = [(issue_id, user_id) for issue_id in issue_ids for user_id in user_ids]
+        results = await asyncio.gather(*(add_watcher(*pair) for pair in pairs), return_exceptions=True)
+        failed = _failures_by_issue({pair: str(result) for pair, result in zip(pairs, results)
+                                     if isinstance(result, Exception)})
+        return {"watched": [issue_id for issue_id in issue_ids if issue_id not in failed], "failed": failed}
+
+    async def get_link_type_ids(self) -> Dict[str, str]:
+        """Get all issue link types as {name: id} map."""
+        return await self._cached("link-type-ids", self._fetch_link_type_ids)
+
+    async def _fetch_link_type_ids(self) -> Dict[str, str]:
+        link_types = await self._get_json("api/issueLinkTypes?fields=id,name")
+        if not link_types:
+            _fail("failed to retrieve issue link types")
+        return {lt["name"]: lt["id"] for lt in link_types}
+
+    async def get_link_type_id(self, name: str) -> str:
+        """Get the ID of a link type, refreshing the cached link types once if the name is unknown."""
+        link_type_id = (await self.get_link_type_ids()).get(name)
+        if link_type_id is None:
+            self._cache.invalidate("link-type-ids")
+            link_type_id = (await self.get_link_type_ids()).get(name)
+        if link_type_id is None:
+            _fail(f"link type {name} not found")
+        return link_type_id
+
+    async def get_project_keys(self) -> List[str]:
+        """Get the short names of all projects, see `YouTrack.get_project_keys`."""
+        return await self._cached("project-keys", self._fetch_project_keys)
+
+    async def _fetch_project_keys(self) -> List[str]:
+        projects = await self._get_json("api/admin/projects?fields=shortName&$top=-1")
+        if not projects:
+            _fail("failed to retrieve projects")
+        return sorted(p["shortName"] for p in projects)
+
+    async def issue_link(self, issue: str = "", link_type: str = "relates-to", links: str = "",
+                         issues_file: Optional[str] = None, query: Optional[str] = None,
+                         workers: int = 8) -> Dict[str, Any]:
+        """Link issues to other issues with concurrent requests, see `YouTrack.issue_link`."""
+        yt_name, direction = _LINK_TYPE_MAP[link_type]
+        link_type_id = await self.get_link_type_id(yt_name)
+        # see `YouTrack.issue_link` for the direction suffix
+        dir_suffix = {"OUTWARD": "t", "INWARD": "s", "BOTH": ""}[direction]
+
+        targets = _split_ids(links)
+        if not targets:
+            _fail("no links given")
+        target_ids = {found["idReadable"].upper(): found["id"]
+                      async for found in self.iter_issues_by_id(targets, "id,idReadable")}
+        missing = [target for target in targets if target.upper() not in target_ids]
+        if missing:
+            _fail(f"issue {', '.join(missing)} not found")
+        issue_ids = [issue_id async for issue_id in self.iter_issue_ids(issue, issues_file, query)]
+        semaphore = asyncio.Semaphore(max(workers, 1))
+
+        async def add_link(issue_id: str, target_id: str) -> None:
+            async with semaphore:
+                await self._assert_ok_status(
+                    f"api/issues/{issue_id}/links/{link_type_id}{dir_suffix}/issues",
+                    method="POST",
+                    headers={"Content-Type": "application/json"},
+                    data=json.dumps({"id": target_id}).encode()
+                )
+
+        pairs = [(issue_id, target_id) for issue_id in issue_ids for target_id in target_ids.values()]
+        results = await asyncio.gather(*(add_link(*pair) for pair in pairs), return_exceptions=True)
+        failed = _failures_by_issue({pair: str(result) for pair, result in zip(pairs, results)
+                                     if isinstance(result, Exception)})
+        return {"linked": [issue_id for issue_id in issue_ids if issue_id not in failed], "failed": failed}
+
+    async def iter_issues(self, query: str, fields: str = "idReadable", page_size: int = 50) -> AsyncIterator[Dict]:
+        """Stream the issues matching a query, prefetching the next page like `YouTrack.iter_issues`."""
+        async def fetch_page(skip: int, top: int) -> Tuple[List[Dict], float]:
+            started = time.monotonic()
+            issues = await self._get_json(
+                f"api/issues?query={quote(query)}&fields={fields}&$top={top}&$skip={skip}"
+            )
+            return issues or [], time.monotonic() - started
+
+        skip, top = 0, page_size
+        next_page = asyncio.ensure_future(fetch_page(skip, top))
+        try:
+            while True:
+                issues, elapsed = await next_page
+                if len(issues) < top:
+                    for issue in issues:
+                        yield issue
+                    return
+                skip += top
+                top = _next_page_size(top, elapsed)
+                next_page = asyncio.ensure_future(fetch_page(skip, top))
+                for issue in issues:
+                    yield issue
+        finally:
+            next_page.cancel()
+
+    async def issue_search(self, query: str, output_format: str = "json",
+                           fields: str = "idReadable") -> Optional[list]:
+        """Search for issues by query, see `YouTrack.issue_search`."""
+        if output_format == "json":
+            return [issue["idReadable"] async for issue in self.iter_issues(query)]
+
+        write_issue = _issue_writer(output_format, fields)
+        async for issue in self.iter_issues(query, fields):
+            write_issue(issue)
+        return None
+
+    async def iter_issues_by_id(self, issue_ids: List[str], fields: str = "idReadable") -> AsyncIterator[Dict]:
+        """Stream issues by ID with one search request per `_COMMAND_CHUNK_SIZE` IDs, unknown IDs are left out."""
+        for start in range(0, len(issue_ids), _COMMAND_CHUNK_SIZE):
+            chunk = issue_ids[start:start + _COMMAND_CHUNK_SIZE]
+            async for issue in self.iter_issues(f"issue id: {', '.join(chunk)}", fields, page_size=len(chunk) + 1):
+                yield issue
+
+    async def issue_close(self, issue: str = "", resolution: str = "done", issues_file: Optional[str] = None,
+                          query: Optional[str] = None) -> Dict[str, Any]:
+        """Close issues with concurrent command requests, see `YouTrack.issue_close`."""
+        state = _RESOLUTION_MAP[resolution]
+        fields = "idReadable,customFields(name,value(name))"
+        issue_ids: List[str] = []
+        if issue or issues_file:
+            issue_ids = [issue_id async for issue_id in self.iter_issue_ids(issue, issues_file)]
+        if not (issue_ids or query):
+            _fail("no issues given, use --issue, --issues-file or --query")
+        found: Dict[str, Dict] = {}
+        async for found_issue in self.iter_issues_by_id(issue_ids, fields):
+            found.setdefault(found_issue["idReadable"].upper(), found_issue)
+        if query:
+            async for found_issue in self.iter_issues(query, fields):
+                found.setdefault(found_issue["idReadable"].upper(), found_issue)
+        skipped = [i["idReadable"] for i in found.values() if _custom_field_value(i, "State") == state]
+        pending = [i["idReadable"] for i in found.values() if _custom_field_value(i, "State") != state]
+
+        command = f"State {_command_value(state)}"
+        failed: Dict[str, str] = {}
+        for failures in await asyncio.gather(*(
+            self.apply_command(pending[start:start + _COMMAND_CHUNK_SIZE], command)
+            for start in range(0, len(pending), _COMMAND_CHUNK_SIZE)
+        )):
+            failed.update(failures)
+        for issue_id in issue_ids:
+            if issue_id.upper() not in found:
+                failed[issue_id] = f"issue {issue_id} not found"
+        return {"closed": [issue_id for issue_id in pending if issue_id not in failed],
+                "skipped": skipped, "failed": failed}
+
+    async def close_issue(self, issue: str, state: str = "Closed (Done)") -> None:
+        """Close an issue by updating its State field."""
+        await self._assert_ok_status(
+            f"api/issues/{issue}",
+            method="POST",
+            headers={"Content-Type": "application/json"},
+            data=json.dumps({
+                "customFields": [
+                    {
+                        "name": "State",
+                        "$type": "StateIssueCustomField",
+                        "value": {"name": state}
+                    }
+                ]
+            }).encode()
+        )
+
+    async def _cached(self, key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+        value = self._cache.peek(key)
+        if value is None:
+            value = await load()
+            if value is not None:
+                self._cache.set(key, value)
+        return value
+
+    async def _send(
+            self,
+            path: str,
+            method: Optional[str] = None,
+            headers: Optional[Dict[str, str]] = None,
+            data: Union[bytes, Iterable[bytes], None] = None
+    ) -> _AsyncResponse:
+        """Send a request through the rate limiter, retrying like `YouTrack._urlopen`."""
+        method = method or ("POST" if data is not None else "GET")
+        headers = {"Authorization": f"Bearer {self.token}", **(headers or {})}
+        idempotent = method in _IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            waiting_since = time.monotonic()
+            await self._limiter.acquire()
+            if self._tracer is not None:
+                self._tracer.add_wait("rate limiter", time.monotonic() - waiting_since)
+            try:
+                response = await self._pool.request(method, f"{self._base_path}/{path}", headers, data)
+            except (OSError, asyncio.TimeoutError) as error:
+                await self._limiter.release()
+                if not idempotent or attempt >= self._max_retries:
+                    raise YouTrackError(f"request `{self.base_url}/{path}` failed: "
+                                        f"{str(error) or type(error).__name__}") from error
+                retry_after = 0.0
+            else:
+                # a throttling server slows down all requests, also the ones that are not retried
+                throttled = response.status in _THROTTLE_STATUS_CODES
+                retry_after = _retry_after(response.headers) if throttled else 0.0
+                retryable = response.status == 429 or (idempotent and response.status in _RETRY_STATUS_CODES)
+                await self._limiter.release(throttled, retry_after)
+                if not retryable or attempt >= self._max_retries:
+                    return response
+            delay = max(retry_after, _backoff(attempt))
+            if self._tracer is not None:
+                self._tracer.add_wait("retries", delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _get_status_code(self, path: str, **kwargs: Any) -> int:
+        return (await self._send(path, **kwargs)).status
+
+    async def _get_json(self, path: str, **kwargs: Any) -> Any:
+        response = await self._send(path, **kwargs)
+        if response.status >= 400:
+            _print_warning(f"request `{self.base_url}/{path}` failed with status code {response.status}: "
+                           f"{response.body.decode()}")
+            return None
+        return json.loads(response.body)
+
+    async def _assert_ok_status(self, path: str, **kwargs: Any) -> None:
+        response = await self._send(path, **kwargs)
+        if 200 <= response.status < 300:
+            return
+        body = f": {response.body.decode()}" if response.status >= 400 else ""
+        _fail(f"request `{self.base_url}/{path}` failed with status code {response.status}{body}")
+
+
+def run_async(method_name: str, client_options: Dict[str, Any], args: Dict[str, Any]) -> Any:
+    """Run a single `AsyncYouTrack` method on a fresh client, as done by `youtrack.py --async`."""
+    async def main() -> Any:
+        youtrack = AsyncYouTrack(**client_options)
+        try:
+            return await getattr(youtrack, method_name)(**args)
+        finally:
+            await youtrack.close()
+
+    return asyncio.run(main())